@@ -0,0 +1,23 @@
+"""index leads (created_at, id) for keyset pagination
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_leads_created_id", "leads", ["created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leads_created_id", table_name="leads")
@@ -0,0 +1,111 @@
+"""campaign_stats rollup maintained by a trigger on leads
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_stats",
+        sa.Column("campaign_name", sa.String(256), primary_key=True, nullable=False),
+        sa.Column("total_leads", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("opened", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("clicked", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("first_activity_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_activity_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Add a (possibly negative) delta to one campaign's counters; LEAST/GREATEST ignore NULLs
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION campaign_stats_apply(
+            p_campaign varchar, p_total integer, p_opened integer, p_clicked integer,
+            p_first timestamptz, p_last timestamptz
+        ) RETURNS void LANGUAGE sql AS $$
+            INSERT INTO campaign_stats AS s
+                (campaign_name, total_leads, opened, clicked, first_activity_at, last_activity_at)
+            VALUES (p_campaign, p_total, p_opened, p_clicked, p_first, p_last)
+            ON CONFLICT (campaign_name) DO UPDATE SET
+                total_leads = s.total_leads + EXCLUDED.total_leads,
+                opened = s.opened + EXCLUDED.opened,
+                clicked = s.clicked + EXCLUDED.clicked,
+                first_activity_at = LEAST(s.first_activity_at, EXCLUDED.first_activity_at),
+                last_activity_at = GREATEST(s.last_activity_at, EXCLUDED.last_activity_at)
+        $$
+    """)
+    )
+    # Only does work when a lead is added/removed, changes campaign, or opened_at/first_click_at flips from NULL
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION leads_campaign_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.campaign_name IS NOT DISTINCT FROM NEW.campaign_name THEN
+                IF NEW.campaign_name IS NOT NULL
+                   AND ((OLD.opened_at IS NULL) <> (NEW.opened_at IS NULL)
+                        OR (OLD.first_click_at IS NULL) <> (NEW.first_click_at IS NULL)) THEN
+                    PERFORM campaign_stats_apply(
+                        NEW.campaign_name, 0,
+                        (NEW.opened_at IS NOT NULL)::int - (OLD.opened_at IS NOT NULL)::int,
+                        (NEW.first_click_at IS NOT NULL)::int - (OLD.first_click_at IS NOT NULL)::int,
+                        LEAST(CASE WHEN OLD.opened_at IS NULL THEN NEW.opened_at END,
+                              CASE WHEN OLD.first_click_at IS NULL THEN NEW.first_click_at END),
+                        GREATEST(CASE WHEN OLD.opened_at IS NULL THEN NEW.opened_at END,
+                                 CASE WHEN OLD.first_click_at IS NULL THEN NEW.first_click_at END)
+                    );
+                END IF;
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.campaign_name IS NOT NULL THEN
+                PERFORM campaign_stats_apply(
+                    OLD.campaign_name, -1,
+                    -(OLD.opened_at IS NOT NULL)::int, -(OLD.first_click_at IS NOT NULL)::int,
+                    NULL, NULL
+                );
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.campaign_name IS NOT NULL THEN
+                PERFORM campaign_stats_apply(
+                    NEW.campaign_name, 1,
+                    (NEW.opened_at IS NOT NULL)::int, (NEW.first_click_at IS NOT NULL)::int,
+                    LEAST(NEW.opened_at, NEW.first_click_at), GREATEST(NEW.opened_at, NEW.first_click_at)
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER leads_campaign_stats
+        AFTER INSERT OR DELETE OR UPDATE OF campaign_name, opened_at, first_click_at ON leads
+        FOR EACH ROW EXECUTE FUNCTION leads_campaign_stats()
+    """)
+    )
+    op.execute(
+        sa.text("""
+        INSERT INTO campaign_stats (campaign_name, total_leads, opened, clicked, first_activity_at, last_activity_at)
+        SELECT campaign_name, COUNT(*), COUNT(opened_at), COUNT(first_click_at),
+               LEAST(MIN(opened_at), MIN(first_click_at)), GREATEST(MAX(opened_at), MAX(first_click_at))
+        FROM leads
+        WHERE campaign_name IS NOT NULL
+        GROUP BY campaign_name
+    """)
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS leads_campaign_stats ON leads"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS leads_campaign_stats()"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS campaign_stats_apply(varchar, integer, integer, integer, timestamptz, timestamptz)"))
+    op.drop_table("campaign_stats")
@@ -0,0 +1,160 @@
+"""partition events by month on created_at; hourly event counts rollup
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text("ALTER TABLE events RENAME TO events_unpartitioned"))
+    op.execute(sa.text("ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey"))
+    for name in ("ix_events_tracking_created", "ix_events_event_type", "ix_events_tracking_id"):
+        op.drop_index(name, table_name="events_unpartitioned")
+
+    # The partition key must be part of the primary key
+    op.execute(
+        sa.text("""
+        CREATE TABLE events (
+            id uuid NOT NULL,
+            tracking_id varchar(128) NOT NULL,
+            event_type varchar(64) NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT events_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    )
+    op.create_index("ix_events_tracking_id", "events", ["tracking_id"], unique=False)
+    op.create_index("ix_events_event_type", "events", ["event_type"], unique=False)
+    op.create_index("ix_events_tracking_created", "events", ["tracking_id", "created_at"], unique=False)
+    # Safety net only: monthly partitions are created ahead of time, so this should stay empty
+    op.execute(sa.text("CREATE TABLE events_default PARTITION OF events DEFAULT"))
+
+    # Monthly partitions events_YYYY_MM (UTC months) from p_from's month through p_months_ahead months from now
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION ensure_event_partitions(p_from timestamptz, p_months_ahead integer)
+        RETURNS integer LANGUAGE plpgsql AS $$
+        DECLARE
+            m timestamp := date_trunc('month', p_from AT TIME ZONE 'UTC');
+            last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => p_months_ahead);
+            part text;
+            created integer := 0;
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('ensure_event_partitions'));
+            WHILE m <= last_month LOOP
+                part := 'events_' || to_char(m, 'YYYY_MM');
+                IF to_regclass(part) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+                        part, m AT TIME ZONE 'UTC', (m + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                    created := created + 1;
+                END IF;
+                m := m + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("SELECT ensure_event_partitions(COALESCE((SELECT MIN(created_at) FROM events_unpartitioned), now()), 3)")
+    )
+    op.execute(
+        sa.text("""
+        INSERT INTO events (id, tracking_id, event_type, created_at)
+        SELECT id, tracking_id, event_type, created_at FROM events_unpartitioned
+    """)
+    )
+    op.drop_table("events_unpartitioned")
+
+    # Hourly counts per campaign (campaign_name '' = lead unknown or without campaign)
+    op.create_table(
+        "event_hourly_counts",
+        sa.Column("campaign_name", sa.String(256), nullable=False),
+        sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_type", sa.String(64), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("campaign_name", "bucket", "event_type"),
+    )
+    op.create_index("ix_event_hourly_counts_bucket", "event_hourly_counts", ["bucket"], unique=False)
+    # Statement-level: one upsert per INSERT statement on events, however many rows it wrote
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION events_hourly_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO event_hourly_counts AS h (campaign_name, bucket, event_type, count)
+            SELECT COALESCE(l.campaign_name, ''),
+                   date_trunc('hour', n.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   n.event_type,
+                   COUNT(*)
+            FROM new_events n
+            LEFT JOIN leads l ON l.tracking_id = n.tracking_id
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+            ON CONFLICT (campaign_name, bucket, event_type) DO UPDATE SET count = h.count + EXCLUDED.count;
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER events_hourly_rollup
+        AFTER INSERT ON events REFERENCING NEW TABLE AS new_events
+        FOR EACH STATEMENT EXECUTE FUNCTION events_hourly_rollup()
+    """)
+    )
+    op.execute(
+        sa.text("""
+        INSERT INTO event_hourly_counts (campaign_name, bucket, event_type, count)
+        SELECT COALESCE(l.campaign_name, ''),
+               date_trunc('hour', e.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+               e.event_type,
+               COUNT(*)
+        FROM events e
+        LEFT JOIN leads l ON l.tracking_id = e.tracking_id
+        GROUP BY 1, 2, 3
+    """)
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS events_hourly_rollup ON events"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS events_hourly_rollup()"))
+    op.drop_index("ix_event_hourly_counts_bucket", table_name="event_hourly_counts")
+    op.drop_table("event_hourly_counts")
+
+    op.execute(sa.text("ALTER TABLE events RENAME TO events_partitioned"))
+    op.execute(sa.text("ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey"))
+    for name in ("ix_events_tracking_created", "ix_events_event_type", "ix_events_tracking_id"):
+        op.drop_index(name, table_name="events_partitioned")
+    op.create_table(
+        "events",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("tracking_id", sa.String(128), nullable=False),
+        sa.Column("event_type", sa.String(64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.execute(
+        sa.text("""
+        INSERT INTO events (id, tracking_id, event_type, created_at)
+        SELECT id, tracking_id, event_type, created_at FROM events_partitioned
+    """)
+    )
+    op.execute(sa.text("DROP TABLE events_partitioned"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS ensure_event_partitions(timestamptz, integer)"))
+    op.create_index("ix_events_tracking_id", "events", ["tracking_id"], unique=False)
+    op.create_index("ix_events_event_type", "events", ["event_type"], unique=False)
+    op.create_index("ix_events_tracking_created", "events", ["tracking_id", "created_at"], unique=False)
@@ -0,0 +1,48 @@
+"""events.is_bot: tag bot clicks/opens; hourly rollup counts human events only
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def _rollup_function(where: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION events_hourly_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO event_hourly_counts AS h (campaign_name, bucket, event_type, count)
+            SELECT COALESCE(l.campaign_name, ''),
+                   date_trunc('hour', n.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   n.event_type,
+                   COUNT(*)
+            FROM new_events n
+            LEFT JOIN leads l ON l.tracking_id = n.tracking_id
+            {where}
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+            ON CONFLICT (campaign_name, bucket, event_type) DO UPDATE SET count = h.count + EXCLUDED.count;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def upgrade() -> None:
+    # Constant default: catalog-only change on PG 11+, partitions inherit the column
+    op.add_column("events", sa.Column("is_bot", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute(sa.text(_rollup_function("WHERE NOT n.is_bot")))
+
+
+def downgrade() -> None:
+    op.execute(sa.text(_rollup_function("")))
+    op.drop_column("events", "is_bot")
@@ -0,0 +1,71 @@
+"""compact events: SMALLINT event_type, BRIN on created_at, drop single-column btrees
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+# event_type codes (app.models.EVENT_TYPE_CODES): 1 = open, 2 = click
+_NAME_OF_CODE = "CASE {col} WHEN 1 THEN 'open' WHEN 2 THEN 'click' END"
+
+
+def _rollup_function(event_type: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION events_hourly_rollup() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO event_hourly_counts AS h (campaign_name, bucket, event_type, count)
+            SELECT COALESCE(l.campaign_name, ''),
+                   date_trunc('hour', n.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   {event_type},
+                   COUNT(*)
+            FROM new_events n
+            LEFT JOIN leads l ON l.tracking_id = n.tracking_id
+            WHERE NOT n.is_bot
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+            ON CONFLICT (campaign_name, bucket, event_type) DO UPDATE SET count = h.count + EXCLUDED.count;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def upgrade() -> None:
+    # event_type and tracking_id alone are never queried selectively; (tracking_id, created_at) covers lookups
+    op.drop_index("ix_events_event_type", table_name="events")
+    op.drop_index("ix_events_tracking_id", table_name="events")
+    # Rewrites every partition once; event_hourly_counts keeps the names, the trigger maps codes
+    op.execute(
+        sa.text(
+            "ALTER TABLE events ALTER COLUMN event_type TYPE smallint "
+            "USING CASE event_type WHEN 'open' THEN 1 WHEN 'click' THEN 2 END"
+        )
+    )
+    op.create_check_constraint("ck_events_event_type", "events", "event_type IN (1, 2)")
+    op.execute(sa.text(_rollup_function(_NAME_OF_CODE.format(col="n.event_type"))))
+    # created_at follows insert order, so a BRIN index (a few pages per partition) serves time ranges
+    op.create_index("ix_events_created_brin", "events", ["created_at"], unique=False, postgresql_using="brin")
+    # New ids are UUIDv7 (app.models.uuid7); existing uuid4 ids stay as they are
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_created_brin", table_name="events")
+    op.execute(sa.text(_rollup_function("n.event_type")))
+    op.drop_constraint("ck_events_event_type", "events", type_="check")
+    op.execute(
+        sa.text(
+            "ALTER TABLE events ALTER COLUMN event_type TYPE varchar(64) USING " + _NAME_OF_CODE.format(col="event_type")
+        )
+    )
+    op.create_index("ix_events_tracking_id", "events", ["tracking_id"], unique=False)
+    op.create_index("ix_events_event_type", "events", ["event_type"], unique=False)
@@ -0,0 +1,37 @@
+"""daily_event_counts: per-lead daily event counts that old raw events are compacted into
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_event_counts",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("tracking_id", sa.String(128), nullable=False),
+        sa.Column("event_type", sa.SmallInteger(), nullable=False),
+        sa.Column("campaign_name", sa.String(256), server_default="", nullable=False),
+        sa.Column("count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("bot_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("day", "tracking_id", "event_type"),
+    )
+    op.create_index("ix_daily_event_counts_tracking_day", "daily_event_counts", ["tracking_id", "day"], unique=False)
+    op.create_index("ix_daily_event_counts_campaign_day", "daily_event_counts", ["campaign_name", "day"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_event_counts_campaign_day", table_name="daily_event_counts")
+    op.drop_index("ix_daily_event_counts_tracking_day", table_name="daily_event_counts")
+    op.drop_table("daily_event_counts")
@@ -0,0 +1,33 @@
+"""ix_events_tracking_created: add id to the key and INCLUDE event_type, is_bot (covering)
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /leads/{id}/events pages on (created_at, id) for one tracking_id; with every column it
+    # reads in the index, the scan is index-only (heap is only visited for not-yet-vacuumed pages)
+    op.drop_index("ix_events_tracking_created", table_name="events")
+    op.create_index(
+        "ix_events_tracking_created",
+        "events",
+        ["tracking_id", "created_at", "id"],
+        unique=False,
+        postgresql_include=["event_type", "is_bot"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_tracking_created", table_name="events")
+    op.create_index("ix_events_tracking_created", "events", ["tracking_id", "created_at"], unique=False)
@@ -0,0 +1,44 @@
+"""leads: pg_trgm GIN index over email, first_name, company, campaign_name for GET /leads/search
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import logging
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger(__name__)
+
+# Must match app.models.LEAD_SEARCH_TEXT exactly, or the planner will not use the index
+_SEARCH_TEXT = (
+    "lower(coalesce(email, '') || ' ' || coalesce(first_name, '') || ' ' || "
+    "coalesce(company, '') || ' ' || coalesce(campaign_name, ''))"
+)
+
+
+def upgrade() -> None:
+    # pg_trgm ships with Postgres (contrib); managed services allow it without superuser. Builds
+    # without contrib (e.g. pgserver, used by benchmarks/run_suite.py --ephemeral) lack it: the
+    # rest of the schema still migrates, and GET /leads/search fails until it is added (README)
+    if not context.is_offline_mode():
+        available = op.get_bind().scalar(sa.text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+        if not available:
+            logger.warning("pg_trgm is not available on this server; skipping ix_leads_search_trgm (GET /leads/search)")
+            return
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    op.execute(sa.text(f"CREATE INDEX ix_leads_search_trgm ON leads USING gin (({_SEARCH_TEXT}) gin_trgm_ops)"))
+
+
+def downgrade() -> None:
+    # The extension is left installed; other objects may use it. IF EXISTS: upgrade may have skipped it
+    op.execute(sa.text("DROP INDEX IF EXISTS ix_leads_search_trgm"))
@@ -0,0 +1,49 @@
+"""campaign_redirects: per-campaign /go destination, with a NOTIFY trigger for reloads
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaign_redirects",
+        sa.Column("campaign_name", sa.String(256), primary_key=True, nullable=False),
+        sa.Column("url", sa.String(2048), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    # Every worker LISTENs on this channel (app.redirects) and reloads the table; delivered on commit
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION campaign_redirects_notify() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('campaign_redirects', '');
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER campaign_redirects_notify
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON campaign_redirects
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_redirects_notify()
+    """)
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS campaign_redirects_notify ON campaign_redirects"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS campaign_redirects_notify()"))
+    op.drop_table("campaign_redirects")
@@ -0,0 +1,164 @@
+"""campaign_stats: statement-level triggers with transition tables, deltas applied in campaign order
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+# Fold the statement's per-lead deltas to one row per campaign and upsert them in campaign_name
+# order, so concurrent statements lock campaign_stats rows in the same order (no deadlocks)
+# and a statement touches each campaign's row once, however many leads it wrote
+_APPLY = """
+            INSERT INTO campaign_stats AS s
+                (campaign_name, total_leads, opened, clicked, first_activity_at, last_activity_at)
+            SELECT campaign_name, SUM(total_leads), SUM(opened), SUM(clicked), MIN(first_at), MAX(last_at)
+            FROM deltas
+            GROUP BY campaign_name
+            ORDER BY campaign_name
+            ON CONFLICT (campaign_name) DO UPDATE SET
+                total_leads = s.total_leads + EXCLUDED.total_leads,
+                opened = s.opened + EXCLUDED.opened,
+                clicked = s.clicked + EXCLUDED.clicked,
+                first_activity_at = LEAST(s.first_activity_at, EXCLUDED.first_activity_at),
+                last_activity_at = GREATEST(s.last_activity_at, EXCLUDED.last_activity_at);
+"""
+# A lead counted in (sign +1) or out (-1) of its campaign; LEAST/GREATEST ignore NULLs
+_ADDED = """
+                SELECT campaign_name, 1 AS total_leads,
+                       (opened_at IS NOT NULL)::int AS opened, (first_click_at IS NOT NULL)::int AS clicked,
+                       LEAST(opened_at, first_click_at) AS first_at, GREATEST(opened_at, first_click_at) AS last_at
+                FROM {rows} WHERE campaign_name IS NOT NULL
+"""
+_REMOVED = """
+                SELECT campaign_name, -1 AS total_leads,
+                       -(opened_at IS NOT NULL)::int AS opened, -(first_click_at IS NOT NULL)::int AS clicked,
+                       NULL::timestamptz AS first_at, NULL::timestamptz AS last_at
+                FROM {rows} WHERE campaign_name IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS leads_campaign_stats ON leads"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS leads_campaign_stats()"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS campaign_stats_apply(varchar, integer, integer, integer, timestamptz, timestamptz)"))
+    # Updates only count leads whose campaign, opened_at or first_click_at changed: the old row
+    # is taken out and the new one put in, which nets to the change
+    op.execute(
+        sa.text(f"""
+        CREATE FUNCTION leads_campaign_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                WITH deltas AS ({_ADDED.format(rows="new_leads")}){_APPLY}
+            ELSIF TG_OP = 'DELETE' THEN
+                WITH deltas AS ({_REMOVED.format(rows="old_leads")}){_APPLY}
+            ELSE
+                WITH changed AS (
+                    SELECT id FROM old_leads o JOIN new_leads n USING (id)
+                    WHERE o.campaign_name IS DISTINCT FROM n.campaign_name
+                       OR o.opened_at IS DISTINCT FROM n.opened_at
+                       OR o.first_click_at IS DISTINCT FROM n.first_click_at
+                ),
+                old_rows AS (SELECT * FROM old_leads WHERE id IN (SELECT id FROM changed)),
+                new_rows AS (SELECT * FROM new_leads WHERE id IN (SELECT id FROM changed)),
+                deltas AS ({_REMOVED.format(rows="old_rows")}
+                UNION ALL{_ADDED.format(rows="new_rows")}){_APPLY}
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    # Transition tables allow only one event per trigger
+    for event, referencing in (
+        ("INSERT", "NEW TABLE AS new_leads"),
+        ("UPDATE", "OLD TABLE AS old_leads NEW TABLE AS new_leads"),
+        ("DELETE", "OLD TABLE AS old_leads"),
+    ):
+        op.execute(
+            sa.text(f"""
+            CREATE TRIGGER leads_campaign_stats_{event.lower()}
+            AFTER {event} ON leads REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION leads_campaign_stats()
+        """)
+        )
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete"):
+        op.execute(sa.text(f"DROP TRIGGER IF EXISTS leads_campaign_stats_{event} ON leads"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS leads_campaign_stats()"))
+    # Row-level trigger of migration 008
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION campaign_stats_apply(
+            p_campaign varchar, p_total integer, p_opened integer, p_clicked integer,
+            p_first timestamptz, p_last timestamptz
+        ) RETURNS void LANGUAGE sql AS $$
+            INSERT INTO campaign_stats AS s
+                (campaign_name, total_leads, opened, clicked, first_activity_at, last_activity_at)
+            VALUES (p_campaign, p_total, p_opened, p_clicked, p_first, p_last)
+            ON CONFLICT (campaign_name) DO UPDATE SET
+                total_leads = s.total_leads + EXCLUDED.total_leads,
+                opened = s.opened + EXCLUDED.opened,
+                clicked = s.clicked + EXCLUDED.clicked,
+                first_activity_at = LEAST(s.first_activity_at, EXCLUDED.first_activity_at),
+                last_activity_at = GREATEST(s.last_activity_at, EXCLUDED.last_activity_at)
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION leads_campaign_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.campaign_name IS NOT DISTINCT FROM NEW.campaign_name THEN
+                IF NEW.campaign_name IS NOT NULL
+                   AND ((OLD.opened_at IS NULL) <> (NEW.opened_at IS NULL)
+                        OR (OLD.first_click_at IS NULL) <> (NEW.first_click_at IS NULL)) THEN
+                    PERFORM campaign_stats_apply(
+                        NEW.campaign_name, 0,
+                        (NEW.opened_at IS NOT NULL)::int - (OLD.opened_at IS NOT NULL)::int,
+                        (NEW.first_click_at IS NOT NULL)::int - (OLD.first_click_at IS NOT NULL)::int,
+                        LEAST(CASE WHEN OLD.opened_at IS NULL THEN NEW.opened_at END,
+                              CASE WHEN OLD.first_click_at IS NULL THEN NEW.first_click_at END),
+                        GREATEST(CASE WHEN OLD.opened_at IS NULL THEN NEW.opened_at END,
+                                 CASE WHEN OLD.first_click_at IS NULL THEN NEW.first_click_at END)
+                    );
+                END IF;
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.campaign_name IS NOT NULL THEN
+                PERFORM campaign_stats_apply(
+                    OLD.campaign_name, -1,
+                    -(OLD.opened_at IS NOT NULL)::int, -(OLD.first_click_at IS NOT NULL)::int,
+                    NULL, NULL
+                );
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.campaign_name IS NOT NULL THEN
+                PERFORM campaign_stats_apply(
+                    NEW.campaign_name, 1,
+                    (NEW.opened_at IS NOT NULL)::int, (NEW.first_click_at IS NOT NULL)::int,
+                    LEAST(NEW.opened_at, NEW.first_click_at), GREATEST(NEW.opened_at, NEW.first_click_at)
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER leads_campaign_stats
+        AFTER INSERT OR DELETE OR UPDATE OF campaign_name, opened_at, first_click_at ON leads
+        FOR EACH ROW EXECUTE FUNCTION leads_campaign_stats()
+    """)
+    )
@@ -0,0 +1,58 @@
+"""leads: NOTIFY lead_cache with deleted tracking_ids, so every worker drops its cached state
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-17
+
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Every worker LISTENs on this channel (app.lead_cache); delivered on commit. One notification
+    # per deleted lead, or a single empty payload (= drop everything) for TRUNCATE and large deletes
+    op.execute(
+        sa.text("""
+        CREATE FUNCTION leads_cache_notify() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            -- old_leads only exists for DELETE
+            IF TG_OP = 'TRUNCATE' THEN
+                PERFORM pg_notify('lead_cache', '');
+            ELSIF (SELECT count(*) > 1000 FROM old_leads) THEN
+                PERFORM pg_notify('lead_cache', '');
+            ELSE
+                PERFORM pg_notify('lead_cache', tracking_id) FROM old_leads;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER leads_cache_notify_delete
+        AFTER DELETE ON leads REFERENCING OLD TABLE AS old_leads
+        FOR EACH STATEMENT EXECUTE FUNCTION leads_cache_notify()
+    """)
+    )
+    op.execute(
+        sa.text("""
+        CREATE TRIGGER leads_cache_notify_truncate
+        AFTER TRUNCATE ON leads
+        FOR EACH STATEMENT EXECUTE FUNCTION leads_cache_notify()
+    """)
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER IF EXISTS leads_cache_notify_truncate ON leads"))
+    op.execute(sa.text("DROP TRIGGER IF EXISTS leads_cache_notify_delete ON leads"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS leads_cache_notify()"))
@@ -0,0 +1,162 @@
+"""
+Bulk lead import: incremental CSV/NDJSON parsing and COPY-based batch inserts.
+
+Each batch is COPYed into a temp staging table, then moved into leads with one
+INSERT ... SELECT ... ON CONFLICT DO NOTHING that also skips emails already present.
+Memory is bounded by the batch size, not the upload size.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+IMPORT_BATCH_SIZE = 5000
+MAX_LINE_BYTES = 64 * 1024
+
+# Header/key spellings accepted for each lead field (CSV headers are lower-cased, spaces -> "_")
+_FIELD_ALIASES = {
+    "lead_id": "tracking_id",
+    "tracking_id": "tracking_id",
+    "email": "email",
+    "campaign_name": "campaign_name",
+    "campaign": "campaign_name",
+    "first_name": "first_name",
+    "company": "company",
+    "company_name": "company",
+}
+_MAX_LENGTHS = {"tracking_id": 128, "email": 320, "campaign_name": 256, "first_name": 256, "company": 256}
+_COLUMNS = ["id", "tracking_id", "campaign_name", "email", "first_name", "company", "ord"]
+
+_CREATE_STAGING = text(
+    """
+    CREATE TEMP TABLE IF NOT EXISTS leads_import (
+        id uuid NOT NULL,
+        tracking_id varchar(128) NOT NULL,
+        campaign_name varchar(256),
+        email varchar(320) NOT NULL,
+        first_name varchar(256),
+        company varchar(256),
+        ord integer NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """
+)
+# First occurrence wins inside the batch (per email, then per tracking_id); emails already
+# in leads are skipped; existing tracking_ids are skipped by ON CONFLICT.
+_MOVE_STAGED = text(
+    """
+    WITH by_email AS (
+        SELECT DISTINCT ON (email) * FROM leads_import WHERE email <> '' ORDER BY email, ord
+    ), candidates AS (
+        SELECT * FROM by_email
+        UNION ALL
+        SELECT * FROM leads_import WHERE email = ''
+    )
+    INSERT INTO leads (id, tracking_id, campaign_name, email, first_name, company)
+    SELECT DISTINCT ON (c.tracking_id) c.id, c.tracking_id, c.campaign_name, c.email, c.first_name, c.company
+    FROM candidates c
+    WHERE c.email = '' OR NOT EXISTS (SELECT 1 FROM leads l WHERE l.email = c.email)
+    ORDER BY c.tracking_id, c.ord
+    ON CONFLICT (tracking_id) DO NOTHING
+    """
+)
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be parsed at all (bad header, oversized line)."""
+
+
+@dataclass(slots=True)
+class ImportCounts:
+    received: int = 0
+    accepted: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buf = ""
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        if len(buf) > MAX_LINE_BYTES:
+            raise ImportFormatError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield line.rstrip("\r")
+    buf += decoder.decode(b"", final=True)
+    if buf.strip():
+        yield buf.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[dict[str, str] | None]:
+    """
+    Yield one dict per non-blank input line (keys are lead field names), or None for a line
+    that cannot be parsed. fmt is "csv" (first line is the header) or "ndjson". One record per line.
+    """
+    header: list[str | None] | None = None
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                yield None
+                continue
+            if not isinstance(obj, dict):
+                yield None
+                continue
+            items = obj.items()
+        else:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [_FIELD_ALIASES.get(h.strip().lower().replace(" ", "_")) for h in values]
+                if "tracking_id" not in header and "email" not in header:
+                    raise ImportFormatError("CSV header must include lead_id/tracking_id or email")
+                continue
+            items = zip(header, values)
+        record: dict[str, str] = {}
+        for key, value in items:
+            field = _FIELD_ALIASES.get(key) if fmt == "ndjson" else key
+            if field is not None and value is not None:
+                record[field] = str(value).strip()
+        yield record
+
+
+def to_staging_row(record: dict[str, str], ord_: int, default_campaign: str | None) -> tuple | None:
+    """Validate one record and build its staging tuple (column order = _COLUMNS), or None if invalid."""
+    tracking_id = record.get("tracking_id") or ""
+    email = record.get("email") or ""
+    if not tracking_id and not email:
+        return None
+    for field, max_len in _MAX_LENGTHS.items():
+        if len(record.get(field) or "") > max_len:
+            return None
+    return (
+        uuid.uuid4(),
+        tracking_id or uuid.uuid4().hex[:32],
+        record.get("campaign_name") or default_campaign or None,
+        email,
+        record.get("first_name") or None,
+        record.get("company") or None,
+        ord_,
+    )
+
+
+async def import_batch(db: AsyncSession, rows: list[tuple]) -> int:
+    """COPY rows into staging and move new leads into leads. Commits; returns the number inserted."""
+    await db.execute(_CREATE_STAGING)  # also opens the transaction the COPY below runs in
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table("leads_import", records=rows, columns=_COLUMNS)
+    result = await db.execute(_MOVE_STAGED)
+    await db.commit()
+    return result.rowcount
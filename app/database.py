@@ -1,18 +1,40 @@
 """
-Async SQLAlchemy setup and dependency injection for DB session.
+Async SQLAlchemy setup and dependency injection: get_db (ORM session) for writes,
+get_conn (Core connection, no unit of work) for reads that must see the latest writes, and
+get_read_db (Core connection on the read replica) for read-only routes.
+
+With READ_DATABASE_URL set, read_engine is a second pool on a streaming replica and
+run_replica_monitor() measures its lag. get_read_db uses the replica only while that lag is
+known and within READ_REPLICA_MAX_LAG, and never for a request that sends X-Read-Primary;
+otherwise the read goes to the primary. Without READ_DATABASE_URL, read_engine is engine.
 """
 
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Depends, Header
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import get_settings
+from app.metrics import counter, instrument_engine, observe_pool_wait
+
+logger = logging.getLogger(__name__)
 
 _settings = get_settings()
 
+REPLICA_CHECK_TIMEOUT = 2.0
+
+READS = counter("db_reads_total", "Read-only route connections by database (replica or primary).", ("target",))
+
 
 def _ensure_asyncpg_url(url: str) -> str:
     """Convert PostgreSQL URL to async driver (asyncpg) for create_async_engine."""
@@ -31,11 +53,46 @@ def _ensure_asyncpg_url(url: str) -> str:
     return url
 
 
-engine = create_async_engine(
-    _ensure_asyncpg_url(_settings.database_url),
-    pool_pre_ping=True,
-    echo=_settings.environment == "development",
-)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Default async queue pool that records how long each checkout waited (db_pool_checkout_wait_seconds)."""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_pool_wait(time.perf_counter() - start)
+
+
+def _connect_args() -> dict[str, Any]:
+    server_settings = {}
+    if _settings.db_statement_timeout_ms > 0:
+        server_settings["statement_timeout"] = str(_settings.db_statement_timeout_ms)
+    return {
+        "timeout": _settings.db_connect_timeout,
+        "prepared_statement_cache_size": _settings.db_statement_cache_size,
+        "server_settings": server_settings,
+    }
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    created = create_async_engine(
+        _ensure_asyncpg_url(url),
+        poolclass=TimedQueuePool,
+        pool_size=_settings.db_pool_size,
+        max_overflow=_settings.db_max_overflow,
+        pool_timeout=_settings.db_pool_timeout,
+        pool_recycle=_settings.db_pool_recycle,
+        pool_pre_ping=_settings.db_pool_pre_ping,
+        connect_args=_connect_args(),
+        echo=_settings.db_echo,
+    )
+    instrument_engine(created.sync_engine)
+    return created
+
+
+engine = _create_engine(_settings.database_url)
+read_engine = _create_engine(_settings.read_database_url) if _settings.read_database_url else engine
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -58,3 +115,156 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+async def get_conn() -> AsyncGenerator[AsyncConnection, None]:
+    """Core connection on the primary: no ORM session, identity map or flush bookkeeping."""
+    async with engine.connect() as conn:
+        yield conn
+
+
+async def listen(channel: str, callback: Callable[[str], None]) -> tuple[AsyncConnection, Any]:
+    """
+    Take a connection out of the pool and LISTEN on channel with it; callback gets each payload.
+    Returns the connection (invalidate it when done: the listener stays registered on it) and
+    the asyncpg connection, whose is_closed() tells when to listen again.
+    """
+    conn = await engine.connect().start()
+    try:
+        driver = (await conn.get_raw_connection()).driver_connection
+        await driver.add_listener(channel, lambda _conn, _pid, _channel, payload: callback(payload))
+    except BaseException:
+        await conn.close()
+        raise
+    return conn, driver
+
+
+class ReplicaStatus:
+    """Read replica lag as last measured by run_replica_monitor()."""
+
+    def __init__(self, max_lag: float) -> None:
+        self.max_lag = max_lag
+        self.lag_seconds: float | None = None  # None: not measured yet, or the replica is unreachable
+
+    @property
+    def usable(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag
+
+    def update(self, lag_seconds: float | None) -> None:
+        was_usable = self.usable
+        self.lag_seconds = lag_seconds
+        if was_usable and not self.usable:
+            logger.warning("Read replica lag %s (max %.1fs); reading from the primary", _fmt_lag(lag_seconds), self.max_lag)
+        elif self.usable and not was_usable:
+            logger.info("Read replica in use (lag %.3fs)", lag_seconds)
+
+
+def _fmt_lag(lag_seconds: float | None) -> str:
+    return "unknown" if lag_seconds is None else f"{lag_seconds:.3f}s"
+
+
+replica_status = ReplicaStatus(_settings.read_replica_max_lag)
+
+
+def read_engine_for(primary: bool = False) -> AsyncEngine:
+    """The engine for a read-only query: the replica if there is one, it is fresh enough, and `primary` is not set."""
+    if primary or read_engine is engine or not replica_status.usable:
+        READS.inc(("primary",))
+        return engine
+    READS.inc(("replica",))
+    return read_engine
+
+
+def read_primary(
+    x_read_primary: bool = Header(
+        False, description="true: read from the primary, e.g. right after your own write (default: the read replica)"
+    ),
+) -> bool:
+    return x_read_primary
+
+
+async def get_read_db(primary: bool = Depends(read_primary)) -> AsyncGenerator[AsyncConnection, None]:
+    """Core connection for read-only routes, on the read replica unless it is stale or X-Read-Primary is sent."""
+    async with read_engine_for(primary).connect() as conn:
+        yield conn
+
+
+_PRIMARY_LSN = text("SELECT pg_current_wal_lsn()::text")
+_REPLICA_LSN = text("SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text")
+
+
+def _lsn(value: str) -> int:
+    high, low = value.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+# (monotonic time, primary WAL position) samples the replica had not replayed at the last check
+_primary_positions: deque[tuple[float, int]] = deque()
+
+
+async def check_replica() -> float:
+    """
+    Replica lag in seconds: how long ago the primary had written WAL that the replica has still
+    not replayed (0 when it has replayed everything seen so far, so an idle primary is not lag).
+    The primary's position is sampled on every check, so this is accurate to one check interval.
+    A server that is not a physical standby cannot be measured and reports 0.
+    """
+    try:
+        async with engine.connect() as conn:
+            position = _lsn(await conn.scalar(_PRIMARY_LSN))
+        if not _primary_positions or _primary_positions[-1][1] < position:
+            _primary_positions.append((time.monotonic(), position))
+    except Exception:
+        # Primary unreachable: the replica cannot get further than the positions already sampled
+        logger.debug("Replica lag check: primary unavailable", exc_info=True)
+    async with read_engine.connect() as conn:
+        in_recovery, replay_lsn = (await conn.execute(_REPLICA_LSN)).one()
+    if not in_recovery or replay_lsn is None:
+        _primary_positions.clear()
+        return 0.0
+    replayed = _lsn(replay_lsn)
+    while _primary_positions and _primary_positions[0][1] <= replayed:
+        _primary_positions.popleft()
+    return round(time.monotonic() - _primary_positions[0][0], 3) if _primary_positions else 0.0
+
+
+async def run_replica_monitor() -> None:
+    """Background loop: measure replica lag every READ_REPLICA_CHECK_INTERVAL seconds."""
+    while True:
+        try:
+            async with asyncio.timeout(REPLICA_CHECK_TIMEOUT):
+                lag = await check_replica()
+        except Exception as exc:
+            if replica_status.lag_seconds is not None:
+                logger.warning("Read replica unreachable: %r", exc)
+            lag = None
+        replica_status.update(lag)
+        await asyncio.sleep(_settings.read_replica_check_interval)
+
+
+async def warm_pool(prepare: Callable[[AsyncConnection], Awaitable[None]] | None = None) -> int:
+    """
+    Open DB_POOL_SIZE connections at once and run `prepare` on each in a rolled-back transaction,
+    so the first requests after startup pay neither for connecting nor for preparing statements.
+    The connections go back to the pool. Returns how many were opened.
+    """
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(_settings.db_pool_size)), return_exceptions=True
+    )
+    conns = [r for r in results if isinstance(r, AsyncConnection)]
+    try:
+        failed = [r for r in results if isinstance(r, BaseException)]
+        if failed:
+            raise failed[0]
+
+        async def _prepare(conn: AsyncConnection) -> None:
+            await conn.execute(text("SELECT 1"))
+            if prepare is not None:
+                await prepare(conn)
+            await conn.rollback()
+
+        await asyncio.gather(*(_prepare(conn) for conn in conns))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in conns))
+    logger.info("Database pool warmed: %d connections", len(conns))
+    return len(conns)
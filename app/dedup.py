@@ -0,0 +1,167 @@
+"""
+Duplicate click/open suppression within DEDUP_WINDOW seconds per (tracking_id, event_type, is_bot).
+Bot and human hits are keyed apart, so a scanner prefetching a link never suppresses the
+person who clicks it a moment later.
+
+Mail security scanners fetch the same link several times within a second; without this
+every hit writes an event row and contends for the same leads row lock.
+
+- Host scope: an mmap-backed hash table in /dev/shm shared by all workers on the host.
+  4-way sets of (64-bit key, last-write time); each set is guarded by an fcntl byte-range
+  lock, so a check is one lock/unlock pair and no syscalls otherwise. A full set evicts its
+  oldest entry, which can only let a duplicate through, never suppress a first hit.
+- Cluster scope (DEDUP_SCOPE=cluster): inline click writes additionally take a transaction
+  advisory lock on the key and check for a recent event in Postgres. A lock held by another
+  transaction means that hit is being written right now.
+
+Suppressed hits are counted in dedup_suppressed_total{event_type, scope}.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics
+from app.config import get_settings
+from app.models import EVENT_TYPE_CODES
+
+try:
+    import fcntl
+except ImportError:  # Windows: table is still shared, sets just aren't locked
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+_WAYS = 4
+_ENTRY = struct.Struct("<Qd")  # key, wall-clock seconds of the last recorded hit
+_SET_BYTES = _WAYS * _ENTRY.size
+
+SUPPRESSED = metrics.counter(
+    "dedup_suppressed_total", "Clicks/opens not written because of a recent identical hit.", ("event_type", "scope")
+)
+
+# First hit in the window wins; a lock held elsewhere means another transaction is writing it now
+_CLUSTER_CHECK = text(
+    """
+    SELECT CASE WHEN pg_try_advisory_xact_lock(:key)
+        THEN EXISTS (
+            SELECT 1 FROM events
+            WHERE tracking_id = :tracking_id AND event_type = :event_type AND is_bot = :is_bot
+              AND created_at > :since
+        )
+        ELSE true
+    END
+    """
+)
+
+
+def event_key(tracking_id: str, event_type: str, is_bot: bool = False) -> int:
+    """Stable 64-bit key (nonzero; 0 marks an empty slot)."""
+    kind = f"{event_type}:bot" if is_bot else event_type
+    digest = hashlib.blake2b(f"{kind}\0{tracking_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedDedupTable:
+    """Fixed-size set-associative table in a shared file mapping."""
+
+    def __init__(self, path: str, slots: int, window: float) -> None:
+        self.window = window
+        self.sets = max(1, slots // _WAYS)
+        size = self.sets * _SET_BYTES
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def seen(self, key: int, now: float) -> bool:
+        """True if key was recorded within the window; otherwise record it at now."""
+        offset = (key % self.sets) * _SET_BYTES
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _SET_BYTES, offset)
+        try:
+            victim, oldest = offset, float("inf")
+            for pos in range(offset, offset + _SET_BYTES, _ENTRY.size):
+                k, ts = _ENTRY.unpack_from(self._map, pos)
+                if k == key:
+                    if now - ts < self.window:
+                        return True
+                    victim = pos
+                    break
+                if ts < oldest:
+                    victim, oldest = pos, ts
+            _ENTRY.pack_into(self._map, victim, key, now)
+            return False
+        finally:
+            if fcntl is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _SET_BYTES, offset)
+
+
+_table: SharedDedupTable | None = None
+
+
+def _shared_table() -> SharedDedupTable:
+    global _table
+    if _table is None:
+        path = _settings.dedup_shm_path
+        if not path:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            path = os.path.join(base, "tracking_dedup")
+        _table = SharedDedupTable(path, _settings.dedup_slots, _settings.dedup_window)
+        logger.info("Dedup window %.2fs, shared table %s (%d slots)", _settings.dedup_window, path, _settings.dedup_slots)
+    return _table
+
+
+def enabled() -> bool:
+    return _settings.dedup_window > 0
+
+
+def seen_on_host(tracking_id: str, event_type: str, is_bot: bool = False) -> bool:
+    """True (and counted) if any worker on this host recorded this hit within the window."""
+    if not enabled():
+        return False
+    if _shared_table().seen(event_key(tracking_id, event_type, is_bot), time.time()):
+        SUPPRESSED.inc((event_type, "host"))
+        return True
+    return False
+
+
+async def seen_in_cluster(
+    db: AsyncSession, tracking_id: str, event_type: str, now: datetime, is_bot: bool = False
+) -> bool:
+    """
+    DEDUP_SCOPE=cluster only: check Postgres inside db's transaction, before the write. The
+    advisory lock is held until that transaction ends, so it also covers the write.
+    """
+    if not enabled() or _settings.dedup_scope != "cluster":
+        return False
+    # pg advisory keys are signed bigint
+    key = event_key(tracking_id, event_type, is_bot)
+    key = key - (1 << 64) if key >= 1 << 63 else key
+    since = now - timedelta(seconds=_settings.dedup_window)
+    result = await db.execute(
+        _CLUSTER_CHECK,
+        {
+            "key": key,
+            "tracking_id": tracking_id,
+            "event_type": EVENT_TYPE_CODES[event_type],
+            "is_bot": is_bot,
+            "since": since,
+        },
+    )
+    if result.scalar():
+        SUPPRESSED.inc((event_type, "cluster"))
+        return True
+    return False
@@ -0,0 +1,688 @@
+"""
+Write-behind ingestion for tracking events.
+
+With INGEST_MODE=queue, routes put events on an in-process bounded queue and respond
+immediately. A background worker (started from the app lifespan) drains the queue in
+batches and writes each batch in one transaction. Remaining events are flushed on shutdown.
+
+Writes that fail because Postgres is unreachable go to the disk spool (app/spool.py) instead;
+run_spool_replay() loads spooled events back once it answers again. Each event carries its id
+from the start and replays insert with ON CONFLICT DO NOTHING, so an event whose commit outcome
+was unknown, or a segment replayed again after a crash, is stored once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any
+
+from sqlalchemy import Boolean, DateTime, Insert, SmallInteger, String, and_, bindparam, cast, func, insert, literal, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.lead_cache import LeadState, lead_cache, stage_lead_state
+from app.models import EVENT_TYPE_CODES, Event, Lead, uuid7
+from app.spool import (
+    SPOOLED,
+    claim,
+    database_down,
+    database_unavailable,
+    mark_down,
+    mark_up,
+    quarantine,
+    read_records,
+    segments,
+    spool,
+)
+
+# Core tables: executemany on these skips ORM bulk handling
+events_table = Event.__table__
+leads_table = Lead.__table__
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+
+@dataclass(frozen=True, slots=True)
+class PendingEvent:
+    """An accepted event not yet written. campaign_name is only set for clicks from /go."""
+
+    tracking_id: str
+    event_type: str  # "open" | "click"
+    created_at: datetime
+    campaign_name: str | None = None
+    is_bot: bool = False  # stored on the event; never touches the lead
+    id: uuid.UUID = field(default_factory=uuid7)  # events.id, fixed before the first write attempt
+
+
+def lead_upsert() -> Insert:
+    """
+    INSERT ... ON CONFLICT (tracking_id) DO UPDATE for leads touched by clicks.
+    first_click_at/opened_at keep the earliest value (LEAST ignores NULLs); a non-null
+    campaign_name replaces the stored one. Rows that would not change are not updated.
+    Add the rows (id, tracking_id, campaign_name, email, first_click_at, opened_at) with
+    .values() or .from_select().
+    """
+    stmt = pg_insert(leads_table)
+    excluded = stmt.excluded
+    c = leads_table.c
+    return stmt.on_conflict_do_update(
+        index_elements=[c.tracking_id],
+        set_={
+            "first_click_at": func.least(c.first_click_at, excluded.first_click_at),
+            "opened_at": func.least(c.opened_at, excluded.opened_at),
+            "campaign_name": func.coalesce(excluded.campaign_name, c.campaign_name),
+        },
+        where=or_(
+            c.first_click_at.is_(None),
+            c.first_click_at > excluded.first_click_at,
+            and_(excluded.opened_at.is_not(None), or_(c.opened_at.is_(None), c.opened_at > excluded.opened_at)),
+            and_(excluded.campaign_name.is_not(None), c.campaign_name.is_distinct_from(excluded.campaign_name)),
+        ),
+    )
+
+
+# Batch lead writes are one statement each, so the statement-level campaign_stats triggers on
+# leads fire once per batch. The upsert takes its rows sorted, so concurrent writers lock lead rows
+# in the same order
+_CLICK_ROWS = func.unnest(
+    cast(bindparam("lead_ids"), ARRAY(UUID(as_uuid=True))),
+    cast(bindparam("tracking_ids"), ARRAY(String)),
+    cast(bindparam("campaign_names"), ARRAY(String)),
+    cast(bindparam("clicked_ats"), ARRAY(DateTime(timezone=True))),
+    cast(bindparam("opened_ats"), ARRAY(DateTime(timezone=True))),
+).table_valued("id", "tracking_id", "campaign_name", "first_click_at", "opened_at").render_derived()
+_LEAD_UPSERT = lead_upsert().from_select(
+    ["id", "tracking_id", "campaign_name", "email", "first_click_at", "opened_at"],
+    select(
+        _CLICK_ROWS.c.id,
+        _CLICK_ROWS.c.tracking_id,
+        _CLICK_ROWS.c.campaign_name,
+        literal(""),
+        _CLICK_ROWS.c.first_click_at,
+        _CLICK_ROWS.c.opened_at,
+    ).order_by(_CLICK_ROWS.c.tracking_id),
+)
+# One INSERT ... SELECT FROM unnest(arrays) per batch: a single statement (so statement-level
+# triggers on events fire once) with fixed SQL that is compiled and prepared once
+_EVENT_ROWS = func.unnest(
+    cast(bindparam("ids"), ARRAY(UUID(as_uuid=True))),
+    cast(bindparam("tracking_ids"), ARRAY(String)),
+    cast(bindparam("event_types"), ARRAY(SmallInteger)),
+    cast(bindparam("created_ats"), ARRAY(DateTime(timezone=True))),
+    cast(bindparam("is_bots"), ARRAY(Boolean)),
+).table_valued("id", "tracking_id", "event_type", "created_at", "is_bot").render_derived()
+_EVENT_INSERT = insert(events_table).from_select(
+    ["id", "tracking_id", "event_type", "created_at", "is_bot"],
+    select(_EVENT_ROWS),
+)
+# Spool replay: rows already stored (same id and created_at) are skipped, and being absent from
+# the transition table they are not counted again by the rollup trigger
+_EVENT_REPLAY = (
+    pg_insert(events_table)
+    .from_select(["id", "tracking_id", "event_type", "created_at", "is_bot"], select(_EVENT_ROWS))
+    .on_conflict_do_nothing()
+)
+# Spool replay: segments of different workers are replayed separately, so an open can be loaded
+# before the click that creates its lead (and is then skipped). Clicks pick those opens up here;
+# replay transactions take _REPLAY_LOCK_KEY so this never runs beside an uncommitted replay
+_REPLAY_LOCK_KEY = 0x7370_6F6F_6C  # "spool"
+_OPEN_BACKFILL = text(
+    """
+    UPDATE leads l SET opened_at = o.opened_at
+    FROM (
+        SELECT tracking_id, min(created_at) AS opened_at FROM events
+        WHERE tracking_id = ANY(:tracking_ids) AND event_type = :open AND NOT is_bot
+        GROUP BY tracking_id
+    ) o
+    WHERE l.tracking_id = o.tracking_id AND (l.opened_at IS NULL OR l.opened_at > o.opened_at)
+    """
+)
+# POST /events/batch: one UPDATE ... FROM unnest(...) for all leads of a batch, with each lead's
+# earliest open and click in the batch (NULL = none); leads that would not change are not touched
+_BATCH_LEADS = func.unnest(
+    cast(bindparam("tracking_ids"), ARRAY(String)),
+    cast(bindparam("opened_ats"), ARRAY(DateTime(timezone=True))),
+    cast(bindparam("clicked_ats"), ARRAY(DateTime(timezone=True))),
+).table_valued("tracking_id", "opened_at", "first_click_at").render_derived()
+_BATCH_LEAD_UPDATE = (
+    update(leads_table)
+    .where(leads_table.c.tracking_id == _BATCH_LEADS.c.tracking_id)
+    .where(
+        or_(
+            and_(
+                _BATCH_LEADS.c.opened_at.is_not(None),
+                or_(leads_table.c.opened_at.is_(None), leads_table.c.opened_at > _BATCH_LEADS.c.opened_at),
+            ),
+            and_(
+                _BATCH_LEADS.c.first_click_at.is_not(None),
+                or_(
+                    leads_table.c.first_click_at.is_(None),
+                    leads_table.c.first_click_at > _BATCH_LEADS.c.first_click_at,
+                ),
+            ),
+        )
+    )
+    .values(
+        opened_at=func.least(leads_table.c.opened_at, _BATCH_LEADS.c.opened_at),
+        first_click_at=func.least(leads_table.c.first_click_at, _BATCH_LEADS.c.first_click_at),
+    )
+    .returning(
+        leads_table.c.tracking_id,
+        leads_table.c.opened_at.is_not(None),
+        leads_table.c.first_click_at.is_not(None),
+        leads_table.c.campaign_name,
+    )
+)
+_OPENS = func.unnest(
+    cast(bindparam("tracking_ids"), ARRAY(String)),
+    cast(bindparam("opened_ats"), ARRAY(DateTime(timezone=True))),
+).table_valued("tracking_id", "opened_at").render_derived()
+_OPEN_UPDATE = (
+    update(leads_table)
+    .where(leads_table.c.tracking_id == _OPENS.c.tracking_id)
+    .where(or_(leads_table.c.opened_at.is_(None), leads_table.c.opened_at > _OPENS.c.opened_at))
+    .values(opened_at=_OPENS.c.opened_at)
+)
+
+
+# /go inline path: the event insert rides along as a data-modifying CTE, so one statement
+# records the click and upserts the lead (atomic under concurrent first clicks)
+_CLICK_EVENT = (
+    insert(events_table)
+    .values(
+        id=bindparam("event_id"),
+        tracking_id=bindparam("b_tracking_id"),
+        event_type="click",
+        created_at=bindparam("b_clicked_at"),
+    )
+    .cte("click_event")
+)
+_CLICK_UPSERT = (
+    lead_upsert()
+    .values(
+        id=bindparam("lead_id"),
+        tracking_id=bindparam("b_tracking_id"),
+        campaign_name=bindparam("b_campaign_name"),
+        email="",
+        first_click_at=bindparam("b_clicked_at"),
+        opened_at=None,
+    )
+    .add_cte(_CLICK_EVENT)
+)
+
+
+def _event_params(events: Sequence[PendingEvent]) -> dict[str, list[Any]]:
+    return {
+        "ids": [e.id for e in events],
+        "tracking_ids": [e.tracking_id for e in events],
+        "event_types": [EVENT_TYPE_CODES[e.event_type] for e in events],
+        "created_ats": [e.created_at for e in events],
+        "is_bots": [e.is_bot for e in events],
+    }
+
+
+def _click_params(rows: Sequence[dict[str, Any]]) -> dict[str, list[Any]]:
+    return {
+        "lead_ids": [r["id"] for r in rows],
+        "tracking_ids": [r["tracking_id"] for r in rows],
+        "campaign_names": [r["campaign_name"] for r in rows],
+        "clicked_ats": [r["first_click_at"] for r in rows],
+        "opened_ats": [r["opened_at"] for r in rows],
+    }
+
+
+async def prepare_statements(conn: AsyncConnection) -> None:
+    """
+    Run the batch write statements with no rows (for database.warm_pool), so the connection has
+    them prepared and the array type codecs loaded before the first flush.
+    """
+    await conn.execute(_EVENT_INSERT, _event_params([]))
+    await conn.execute(_LEAD_UPSERT, _click_params([]))
+    await conn.execute(_OPEN_UPDATE, {"tracking_ids": [], "opened_ats": []})
+
+
+def _click_is_redundant(state: LeadState | None, campaign_name: str | None, opened_at: datetime | None = None) -> bool:
+    """True when the cached lead already has everything this click (and open) would set."""
+    return (
+        state is not None
+        and state.clicked
+        and (not campaign_name or campaign_name == state.campaign_name)
+        and (opened_at is None or state.opened)
+    )
+
+
+async def record_click(db: AsyncSession, event: PendingEvent) -> None:
+    """
+    Write one click and upsert its lead in a single statement, in the caller's transaction (no commit).
+    A repeat click on a cached, already-clicked lead, or a bot click, only appends the event row.
+    """
+    if event.is_bot:
+        await db.execute(_EVENT_INSERT, _event_params([event]))
+        return
+    state = lead_cache.get(event.tracking_id)
+    if _click_is_redundant(state, event.campaign_name):
+        await db.execute(_EVENT_INSERT, _event_params([event]))
+        return
+    await db.execute(
+        _CLICK_UPSERT,
+        {
+            "event_id": event.id,
+            "lead_id": uuid.uuid4(),
+            "b_tracking_id": event.tracking_id,
+            "b_campaign_name": event.campaign_name or None,
+            "b_clicked_at": event.created_at,
+        },
+    )
+    stage_lead_state(
+        db,
+        event.tracking_id,
+        LeadState(
+            opened=state is not None and state.opened,
+            clicked=True,
+            campaign_name=event.campaign_name or (state.campaign_name if state is not None else None),
+        ),
+    )
+
+
+async def write_events(db: AsyncSession, events: Sequence[PendingEvent], replay: bool = False) -> None:
+    """
+    Write events and apply their lead updates in the caller's transaction (no commit).
+    With replay, events whose id is already stored are skipped (lead updates are idempotent anyway)
+    and clicked leads take opened_at from opens already stored.
+    Clicks create the lead if missing and set first_click_at; opens set opened_at on existing leads.
+
+    Set-based: the batch is folded to one row per tracking_id and written with one leads upsert
+    and one opened_at UPDATE, then all events go in one INSERT ... SELECT FROM unnest(...).
+    A batch costs a few round trips regardless of size.
+    Leads the cache shows as already clicked/opened get no lead write at all; bot events are
+    only inserted.
+    """
+    if not events:
+        return
+
+    # ON CONFLICT cannot touch the same row twice in one statement, and one row per lead keeps writes minimal
+    clicks: dict[str, dict[str, Any]] = {}
+    opens: dict[str, datetime] = {}
+    for e in events:
+        if e.is_bot:
+            continue
+        if e.event_type == "open":
+            prev = opens.get(e.tracking_id)
+            if prev is None or e.created_at < prev:
+                opens[e.tracking_id] = e.created_at
+            continue
+        row = clicks.get(e.tracking_id)
+        if row is None:
+            clicks[e.tracking_id] = {
+                "id": uuid.uuid4(),
+                "tracking_id": e.tracking_id,
+                "campaign_name": e.campaign_name or None,
+                "email": "",
+                "first_click_at": e.created_at,
+                "opened_at": None,
+            }
+            continue
+        if e.created_at < row["first_click_at"]:
+            row["first_click_at"] = e.created_at
+        if e.campaign_name:
+            row["campaign_name"] = e.campaign_name
+    for tracking_id in list(opens):
+        row = clicks.get(tracking_id)
+        if row is not None:
+            row["opened_at"] = opens.pop(tracking_id)
+
+    cached = {t: lead_cache.get(t) for t in clicks.keys() | opens.keys()}
+    for t in list(clicks):
+        row, state = clicks[t], cached[t]
+        if _click_is_redundant(state, row["campaign_name"], row["opened_at"]):
+            del clicks[t]
+            continue
+        stage_lead_state(
+            db,
+            t,
+            LeadState(
+                opened=row["opened_at"] is not None or (state is not None and state.opened),
+                clicked=True,
+                campaign_name=row["campaign_name"] or (state.campaign_name if state is not None else None),
+            ),
+        )
+    # Opens on leads not in the cache: one lookup tells us which exist and are not opened yet
+    unknown = [t for t in opens if cached[t] is None]
+    if unknown:
+        c = leads_table.c
+        result = await db.execute(
+            select(c.tracking_id, c.opened_at.is_not(None), c.first_click_at.is_not(None), c.campaign_name).where(
+                c.tracking_id.in_(unknown)
+            )
+        )
+        for tracking_id, opened, clicked, campaign_name in result:
+            state = LeadState(opened=opened, clicked=clicked, campaign_name=campaign_name)
+            lead_cache.put(tracking_id, state)
+            cached[tracking_id] = state
+    opens = {t: at for t, at in opens.items() if cached[t] is not None and not cached[t].opened}
+    for t in opens:
+        state = cached[t]
+        stage_lead_state(db, t, LeadState(opened=True, clicked=state.clicked, campaign_name=state.campaign_name))
+
+    if clicks:
+        await db.execute(_LEAD_UPSERT, _click_params(list(clicks.values())))
+    if opens:
+        await db.execute(_OPEN_UPDATE, {"tracking_ids": list(opens), "opened_ats": list(opens.values())})
+    # Leads first, so the hourly rollup trigger on events sees campaigns of leads created by this batch
+    if not replay:
+        await db.execute(_EVENT_INSERT, _event_params(events))
+        return
+    await db.execute(_EVENT_REPLAY, _event_params(events))
+    if clicks:
+        await db.execute(_OPEN_BACKFILL, {"tracking_ids": sorted(clicks), "open": EVENT_TYPE_CODES["open"]})
+
+
+async def write_event_batch(db: AsyncSession, events: Sequence[PendingEvent]) -> None:
+    """
+    POST /events/batch: insert events and set opened_at / first_click_at (earliest wins) on the
+    leads that exist, in the caller's transaction (no commit). Unlike /go clicks, no lead is
+    created. Two statements whatever the batch size: one UPDATE for the leads, one INSERT for
+    the events. The lead cache is not consulted: items may carry a created_at earlier than the
+    stored one, which the cache cannot tell.
+    """
+    if not events:
+        return
+    firsts: dict[str, list[datetime | None]] = {}  # tracking_id -> [earliest open, earliest click]
+    for e in events:
+        slot = 0 if e.event_type == "open" else 1
+        row = firsts.setdefault(e.tracking_id, [None, None])
+        if row[slot] is None or e.created_at < row[slot]:
+            row[slot] = e.created_at
+    # Sorted so concurrent writers lock lead rows in the same order
+    tracking_ids = sorted(firsts)
+    result = await db.execute(
+        _BATCH_LEAD_UPDATE,
+        {
+            "tracking_ids": tracking_ids,
+            "opened_ats": [firsts[t][0] for t in tracking_ids],
+            "clicked_ats": [firsts[t][1] for t in tracking_ids],
+        },
+    )
+    for tracking_id, opened, clicked, campaign_name in result:
+        stage_lead_state(db, tracking_id, LeadState(opened=opened, clicked=clicked, campaign_name=campaign_name))
+    # Leads first, so the hourly rollup trigger on events sees their campaigns
+    await db.execute(_EVENT_INSERT, _event_params(events))
+
+
+# Column limits: an event over them would be spooled fine but rejected on every replay
+_TRACKING_ID_MAX = events_table.c.tracking_id.type.length
+_CAMPAIGN_NAME_MAX = leads_table.c.campaign_name.type.length
+
+
+def _spoolable(e: PendingEvent) -> bool:
+    return (
+        0 < len(e.tracking_id) <= _TRACKING_ID_MAX
+        and len(e.campaign_name or "") <= _CAMPAIGN_NAME_MAX
+        and e.event_type in EVENT_TYPE_CODES
+    )
+
+
+def _spool_record(e: PendingEvent) -> dict[str, Any]:
+    return {
+        "id": e.id,
+        "tracking_id": e.tracking_id,
+        "event_type": e.event_type,
+        "created_at": e.created_at,
+        "campaign_name": e.campaign_name,
+        "is_bot": e.is_bot,
+    }
+
+
+def spool_events(events: Iterable[PendingEvent]) -> None:
+    """Append events to the disk spool (database unreachable). Events the database would reject are dropped."""
+    for e in events:
+        if not _spoolable(e):
+            logger.error("Not spooling event the database would reject: %s", e)
+            continue
+        spool.append(_spool_record(e))
+
+
+def _spooled_event(record: dict[str, Any]) -> PendingEvent:
+    return PendingEvent(
+        tracking_id=record["tracking_id"],
+        event_type=record["event_type"],
+        created_at=datetime.fromisoformat(record["created_at"]),
+        campaign_name=record["campaign_name"],
+        is_bot=record["is_bot"],
+        id=uuid.UUID(record["id"]),
+    )
+
+
+async def flush_events(events: list[PendingEvent]) -> None:
+    """
+    Write events in their own session and transaction. If the database is unreachable they are
+    spooled. If it rejects the batch for any other reason, each half is written on its own, so
+    only the events it rejects are logged and dropped. Nothing is raised (background use).
+    """
+    if database_down():
+        spool_events(events)
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            await write_events(db, events)
+            await db.commit()
+    except Exception as exc:
+        if database_unavailable(exc):
+            mark_down(exc)
+            spool_events(events)
+            return
+        if len(events) == 1:
+            logger.exception("Dropping event the database rejects: %s", events[0])
+            return
+        logger.debug("Writing %d events failed; retrying in halves", len(events), exc_info=True)
+        mid = len(events) // 2
+        await flush_events(events[:mid])
+        await flush_events(events[mid:])
+        return
+    logger.debug("Flushed %d events", len(events))
+
+
+async def _replay_events(path: str, events: list[PendingEvent]) -> int:
+    """
+    Write spooled events in one transaction. If the database rejects them for a reason other
+    than availability, each half is retried on its own and the events it still rejects are moved
+    to the segment's quarantine file. Returns the number written.
+    """
+    if not events:
+        return 0
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _REPLAY_LOCK_KEY})
+            await write_events(db, events, replay=True)
+            await db.commit()
+    except Exception as exc:
+        if database_unavailable(exc):
+            raise
+        if len(events) == 1:
+            logger.exception("Spooled event rejected by the database: %s", events[0])
+            quarantine(path, [_spool_record(events[0])])
+            return 0
+        mid = len(events) // 2
+        return await _replay_events(path, events[:mid]) + await _replay_events(path, events[mid:])
+    SPOOLED.inc(("replayed",), len(events))
+    return len(events)
+
+
+async def replay_spool() -> int:
+    """
+    Load every closed spool segment, SPOOL_REPLAY_BATCH events per transaction, and delete each
+    segment once all of it is committed. Records that cannot be decoded or that the database
+    rejects go to <segment>.bad instead, so one bad record never blocks the rest of the spool.
+    Returns the number of events replayed.
+    """
+    replayed = 0
+    for path in segments(spool.directory):
+        fd = claim(path)
+        if fd is None:
+            continue
+        try:
+            records = read_records(fd, path)
+            while chunk := list(islice(records, _settings.spool_replay_batch)):
+                batch, bad = [], []
+                for record in chunk:
+                    try:
+                        batch.append(_spooled_event(record))
+                    except (KeyError, TypeError, ValueError):
+                        bad.append(record)
+                if bad:
+                    logger.error("Spool segment %s: %d undecodable records", path, len(bad))
+                    quarantine(path, bad)
+                replayed += await _replay_events(path, batch)
+            os.unlink(path)
+            logger.info("Replayed spool segment %s", path)
+        finally:
+            os.close(fd)
+    return replayed
+
+
+SPOOL_PROBE_TIMEOUT = 2.0
+
+
+async def run_spool_replay() -> None:
+    """
+    Background loop, every SPOOL_REPLAY_INTERVAL seconds: while the database is marked down,
+    probe it; once it answers, close this process's open segment and replay all closed ones.
+    """
+    while True:
+        await asyncio.sleep(_settings.spool_replay_interval)
+        if database_down():
+            try:
+                async with asyncio.timeout(SPOOL_PROBE_TIMEOUT):
+                    async with engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+            except Exception:
+                continue
+            mark_up()
+        try:
+            if spool.pending:
+                await spool.rotate()
+            replayed = await replay_spool()
+        except Exception as exc:
+            if database_unavailable(exc):
+                mark_down(exc)
+            else:
+                logger.exception("Spool replay failed")
+        else:
+            if replayed:
+                logger.warning("Replayed %d spooled events", replayed)
+
+
+class IngestQueue:
+    """Bounded in-process queue plus the worker task that drains it."""
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float) -> None:
+        self._maxsize = maxsize
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue[PendingEvent | None] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._maxsize)
+        self._task = asyncio.create_task(self._run(), name="ingest-worker")
+        self._accepting = True
+        logger.info(
+            "Ingest queue started maxsize=%s batch_size=%s flush_interval=%ss",
+            self._maxsize,
+            self._batch_size,
+            self._flush_interval,
+        )
+
+    async def stop(self) -> None:
+        """Stop accepting, flush everything already queued, then stop the worker."""
+        if self._task is None or self._queue is None:
+            return
+        self._accepting = False
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+        logger.info("Ingest queue stopped")
+
+    def offer(self, event: PendingEvent) -> bool:
+        """Enqueue without waiting. Returns False if not running or full (caller writes inline)."""
+        if not self._accepting or self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def submit(self, event: PendingEvent) -> bool:
+        """Enqueue according to INGEST_QUEUE_FULL. Returns False when the caller must write inline."""
+        if self.offer(event):
+            return True
+        if not self._accepting or self._queue is None or _settings.ingest_queue_full != "wait":
+            return False
+        try:
+            await asyncio.wait_for(self._queue.put(event), _settings.ingest_put_timeout)
+        except TimeoutError:
+            logger.warning("Ingest queue full; writing inline tracking_id=%s", event.tracking_id)
+            return False
+        return True
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[PendingEvent]) -> None:
+        await flush_events(batch)
+
+
+ingest_queue = IngestQueue(
+    maxsize=_settings.ingest_queue_size,
+    batch_size=_settings.ingest_batch_size,
+    flush_interval=_settings.ingest_flush_interval,
+)
@@ -0,0 +1,60 @@
+"""
+Fast JSON responses: Core result rows (and values a route builds itself) are encoded straight
+to bytes with orjson.
+
+Building a Pydantic model per row and letting FastAPI validate the list again costs more CPU
+than the query on large pages. Routes keep their response_model (OpenAPI is unchanged) but
+return a Response built from these bytes, which FastAPI sends as-is. The selected column labels
+must match the response model's field names, in its field order; output matches Pydantic's
+JSON (UUIDs as strings, UTC datetimes with a trailing Z, None as null).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+from uuid import UUID
+
+import orjson
+from sqlalchemy import Row
+
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    # asyncpg returns its own UUID subclass, which orjson only serializes through this hook
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _keys(row: Row[Any]) -> list[str]:
+    # Columns selected from a subquery are named by a str subclass, which orjson refuses as a key
+    return [str(k) for k in row._fields]
+
+
+def _dicts(rows: Sequence[Row[Any]]) -> list[dict[str, Any]]:
+    if not rows:
+        return []
+    keys = _keys(rows[0])
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def dump(obj: Any) -> bytes:
+    """Any JSON value a route has built itself (dicts, lists), with the same encoding as rows."""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def dump_row(row: Row[Any]) -> bytes:
+    return orjson.dumps(dict(zip(_keys(row), row)), default=_default, option=_OPTIONS)
+
+
+def dump_rows(rows: Sequence[Row[Any]]) -> bytes:
+    """One JSON array of objects."""
+    return orjson.dumps(_dicts(rows), default=_default, option=_OPTIONS)
+
+
+def dump_ndjson(rows: Sequence[Row[Any]]) -> bytes:
+    """One JSON object per line, each line terminated by a newline."""
+    options = _OPTIONS | orjson.OPT_APPEND_NEWLINE
+    return b"".join(orjson.dumps(d, default=_default, option=options) for d in _dicts(rows))
@@ -0,0 +1,153 @@
+"""
+In-process LRU + TTL cache of tracking_id -> small lead state.
+
+Lets repeat clicks/opens (forwarded emails, security scanners) skip the lead lookup and
+upsert and only append the event row. Only existing leads are cached (an entry means the lead
+exists), so a lead created by another worker is seen on its next event. States learned from
+our own writes are published only after the transaction commits (stage_lead_state).
+
+Deleting leads (any statement, including manual SQL) notifies the lead_cache channel (trigger
+from migration 017); run_lead_cache_invalidation() drops those entries in every worker on every
+host. While that listening connection is down, entries expire after LEAD_CACHE_TTL, and the
+whole cache is dropped when it reconnects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import listen
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+CHANNEL = "lead_cache"
+# How often a lost listening connection is noticed and re-established
+RELISTEN_INTERVAL = 5.0
+
+
+@dataclass(frozen=True, slots=True)
+class LeadState:
+    """
+    What the ingestion path needs to know about an existing lead. False/None mean "not set or
+    unknown": they only cause a redundant (guarded) write, never a skipped one.
+    """
+
+    opened: bool = False
+    clicked: bool = False
+    campaign_name: str | None = None
+
+
+class LeadStateCache:
+    """Bounded LRU with per-entry TTL. Not thread-safe; used from the event loop only."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, LeadState]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tracking_id: str) -> LeadState | None:
+        entry = self._entries.get(tracking_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, state = entry
+        if expires_at < time.monotonic():
+            del self._entries[tracking_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(tracking_id)
+        self.hits += 1
+        return state
+
+    def put(self, tracking_id: str, state: LeadState) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[tracking_id] = (time.monotonic() + self.ttl, state)
+        self._entries.move_to_end(tracking_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, tracking_id: str) -> None:
+        self._entries.pop(tracking_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+lead_cache = LeadStateCache(maxsize=_settings.lead_cache_size, ttl=_settings.lead_cache_ttl)
+
+
+def _invalidated(tracking_id: str) -> None:
+    # Empty payload: TRUNCATE or a large delete
+    if tracking_id:
+        lead_cache.invalidate(tracking_id)
+    else:
+        lead_cache.clear()
+
+
+async def run_lead_cache_invalidation() -> None:
+    """Background loop: LISTEN on CHANNEL and drop the entries of deleted leads."""
+    listener: AsyncConnection | None = None
+    driver: Any = None
+    try:
+        while True:
+            if driver is None or driver.is_closed():
+                if listener is not None:
+                    await listener.invalidate()
+                    listener = driver = None
+                try:
+                    listener, driver = await listen(CHANNEL, _invalidated)
+                    # Leads deleted while nobody was listening
+                    lead_cache.clear()
+                except Exception:
+                    logger.warning(
+                        "Cannot LISTEN on %s; cached lead states expire after LEAD_CACHE_TTL only", CHANNEL, exc_info=True
+                    )
+            await asyncio.sleep(RELISTEN_INTERVAL)
+    finally:
+        if listener is not None:
+            # Not returned to the pool: the listener is registered on it
+            await listener.invalidate()
+
+
+_STAGED_KEY = "lead_states"
+
+
+def stage_lead_state(db: AsyncSession, tracking_id: str, state: LeadState) -> None:
+    """Cache state once db's transaction commits (discarded on rollback)."""
+    db.info.setdefault(_STAGED_KEY, {})[tracking_id] = state
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged(session: Session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if staged:
+        for tracking_id, state in staged.items():
+            lead_cache.put(tracking_id, state)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
@@ -1,32 +1,93 @@
 """
 ApexNeural tracking microservice — FastAPI app entrypoint.
 
-Run with: uvicorn app.main:app --host 0.0.0.0 --port 8000
+Run with: python -m app.serve (one worker per CPU, see app/serve.py)
+or, single process: uvicorn app.main:app --host 0.0.0.0 --port 8000
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from typing import Any
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 
-from app.config import get_settings
-from app.routes import events, leads, tracking
+from app import metrics
+from app.config import configure_logging, get_settings
+from app.database import engine, read_engine, replica_status, run_replica_monitor, warm_pool
+from app.ingest import ingest_queue, prepare_statements, run_spool_replay
+from app.lead_cache import lead_cache, run_lead_cache_invalidation
+from app.partitions import run_partition_maintenance
+from app.redirects import redirect_table, run_redirect_refresh
+from app.retention import run_retention
+from app.routes import campaigns, events, export, leads, redirects, tracking
+from app.spool import database_down, spool
 
 settings = get_settings()
 
 # Configure logging so production and local runs have consistent output
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper(), logging.INFO),
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    stream=sys.stdout,
-)
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+READY_CHECK_TIMEOUT = 2.0
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.ready = False
+    if settings.db_pool_warm:
+        try:
+            await warm_pool(prepare_statements)
+        except Exception:
+            # Start anyway; /health/ready fails its database check until Postgres is reachable
+            logger.exception("Database pool warmup failed")
+    try:
+        await redirect_table.load()
+    except Exception:
+        # /go falls back to REDIRECT_BASE_URL until the refresh loop loads the table
+        logger.exception("Loading campaign redirects failed")
+    # Write-behind ingestion: start the batch writer, flush whatever is queued on shutdown
+    if settings.ingest_mode == "queue":
+        await ingest_queue.start()
+    tasks = [
+        asyncio.create_task(run_partition_maintenance(), name="event-partitions"),
+        asyncio.create_task(run_redirect_refresh(), name="campaign-redirects"),
+        # Disk spool for events while Postgres is unreachable: batched fsync, probe + replay
+        asyncio.create_task(spool.run(), name="spool-writer"),
+        asyncio.create_task(run_spool_replay(), name="spool-replay"),
+    ]
+    if settings.retention_days > 0:
+        tasks.append(asyncio.create_task(run_retention(), name="event-retention"))
+    if settings.lead_cache_size > 0:
+        tasks.append(asyncio.create_task(run_lead_cache_invalidation(), name="lead-cache-invalidation"))
+    if read_engine is not engine:
+        tasks.append(asyncio.create_task(run_replica_monitor(), name="replica-lag"))
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        await ingest_queue.stop()
+        # Anything spooled (including by the final queue flush) is on disk before exit
+        await spool.rotate()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="Lead tracking: GET /go/{campaign_name}/{tracking_id} records click and redirects. Events stored in UTC.",
+    lifespan=lifespan,
 )
 
 # CORS: from env CORS_ORIGINS ("*" or comma-separated list)
@@ -41,12 +102,69 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
+# Outermost, so latency includes CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.register_gauge("ingest_queue_depth", "Events waiting in the write-behind queue.", ingest_queue.depth)
+metrics.register_gauge("database_down", "1 while this worker spools events because Postgres is unreachable.", lambda: int(database_down()))
+if read_engine is not engine:
+    metrics.register_gauge(
+        "db_replica_lag_seconds",
+        "Read replica lag as last measured (-1 while unknown or unreachable).",
+        lambda: replica_status.lag_seconds if replica_status.lag_seconds is not None else -1.0,
+    )
+metrics.register_gauge("campaign_redirects", "Campaign redirect routes loaded.", lambda: len(redirect_table))
+metrics.register_gauge("lead_cache_size", "Entries in the lead state cache.", lambda: len(lead_cache))
+metrics.register_gauge("lead_cache_hits_total", "Lead state cache hits.", lambda: lead_cache.hits, "counter")
+metrics.register_gauge("lead_cache_misses_total", "Lead state cache misses.", lambda: lead_cache.misses, "counter")
+metrics.register_gauge("lead_cache_evictions_total", "Lead state cache evictions.", lambda: lead_cache.evictions, "counter")
 
 app.include_router(tracking.router, tags=["tracking"])
 app.include_router(events.router, tags=["events"])
 app.include_router(leads.router, tags=["leads"])
+app.include_router(campaigns.router, tags=["campaigns"])
+app.include_router(redirects.router, tags=["campaign redirects"])
+app.include_router(export.router, tags=["export"])
+
+
+@app.get(
+    "/health",
+    summary="Liveness",
+    description=(
+        "The process is up and serving requests. Does not touch the database. With READ_DATABASE_URL set, "
+        "also reports the read replica's lag as last measured (lag_seconds; null while unknown or unreachable) "
+        "and whether read-only routes are using it (in_use)."
+    ),
+)
+async def health() -> dict[str, Any]:
+    body: dict[str, Any] = {"status": "ok"}
+    if read_engine is not engine:
+        body["replica"] = {"lag_seconds": replica_status.lag_seconds, "in_use": replica_status.usable}
+    return body
+
+
+@app.get(
+    "/health/ready",
+    summary="Readiness",
+    description=(
+        "200 once startup (pool warmup, ingest worker) has finished and the database answers; 503 while "
+        "starting, after shutdown has begun, or when the database is unreachable."
+    ),
+)
+async def health_ready(response: Response) -> dict[str, str]:
+    if not getattr(app.state, "ready", False):
+        response.status_code = 503
+        return {"status": "not ready"}
+    try:
+        async with asyncio.timeout(READY_CHECK_TIMEOUT):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception:
+        logger.warning("Readiness check: database unavailable", exc_info=True)
+        response.status_code = 503
+        return {"status": "database unavailable"}
+    return {"status": "ready"}
 
 
-@app.get("/health")
-async def health() -> dict[str, str]:
-    return {"status": "ok"}
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,233 @@
+"""
+Low-overhead request/DB instrumentation with Prometheus text exposition (GET /metrics).
+
+No client library: fixed-bucket histograms are a list of counters plus a bisect per observation.
+- MetricsMiddleware (pure ASGI) times every request per (method, route template) and counts the
+  DB round trips and DB time of that request.
+- instrument_engine() hooks SQLAlchemy cursor events (every router's queries, no per-route code).
+- TimedQueuePool (app.database) records connection pool checkout wait.
+- counter() registers counters owned by other modules (dedup suppressions).
+- register_gauge() exposes values read at scrape time (ingest queue depth, lead cache counters).
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50)
+
+
+class Histogram:
+    """Prometheus-style histogram; counts are stored per bucket and made cumulative when rendered."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class LabeledHistogram:
+    """One Histogram per label-value tuple, created on first observation."""
+
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...], bounds: tuple[float, ...]) -> None:
+        self.name = name
+        self.help = help_
+        self.labels = labels
+        self.bounds = bounds
+        self.children: dict[tuple[str, ...], Histogram] = {}
+
+    def child(self, label_values: tuple[str, ...]) -> Histogram:
+        h = self.children.get(label_values)
+        if h is None:
+            h = self.children[label_values] = Histogram(self.bounds)
+        return h
+
+    def observe(self, label_values: tuple[str, ...], value: float) -> None:
+        self.child(label_values).observe(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help_
+        self.labels = labels
+        self.values: dict[tuple[Any, ...], int] = {}
+
+    def inc(self, label_values: tuple[Any, ...], amount: int = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+
+REQUEST_DURATION = LabeledHistogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route"), LATENCY_BUCKETS
+)
+REQUESTS = Counter("http_requests_total", "Requests by route and status code.", ("method", "route", "status"))
+REQUEST_DB_QUERIES = LabeledHistogram(
+    "http_request_db_queries", "DB round trips per request by route.", ("method", "route"), COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = LabeledHistogram(
+    "http_request_db_seconds", "Time spent in DB calls per request by route.", ("method", "route"), LATENCY_BUCKETS
+)
+DB_QUERY_DURATION = LabeledHistogram(
+    "db_query_duration_seconds", "Duration of each DB statement (requests and background work).", (), LATENCY_BUCKETS
+)
+POOL_CHECKOUT_WAIT = LabeledHistogram(
+    "db_pool_checkout_wait_seconds", "Time waiting to check a connection out of the pool.", (), LATENCY_BUCKETS
+)
+
+_HISTOGRAMS: list[LabeledHistogram] = [
+    REQUEST_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_SECONDS,
+    DB_QUERY_DURATION,
+    POOL_CHECKOUT_WAIT,
+]
+_COUNTERS: list[Counter] = [REQUESTS]
+_GAUGES: list[tuple[str, str, str, Callable[[], float]]] = []
+
+# [db round trips, db seconds] for the current request; None outside requests
+_request_db: ContextVar[list[Any] | None] = ContextVar("request_db", default=None)
+_NO_LABELS: tuple[str, ...] = ()
+_LE_INF = 'le="+Inf"'
+
+
+def counter(name: str, help_: str, labels: tuple[str, ...]) -> Counter:
+    """Create a labeled counter that render() includes."""
+    c = Counter(name, help_, labels)
+    _COUNTERS.append(c)
+    return c
+
+
+def register_gauge(name: str, help_: str, fn: Callable[[], float], metric_type: str = "gauge") -> None:
+    """Expose fn() at scrape time. metric_type "counter" for monotonically increasing values."""
+    _GAUGES.append((name, help_, metric_type, fn))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement; attribute it to the current request if there is one."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: Any, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+        DB_QUERY_DURATION.observe(_NO_LABELS, elapsed)
+        acc = _request_db.get()
+        if acc is not None:
+            acc[0] += 1
+            acc[1] += elapsed
+
+
+def observe_pool_wait(seconds: float) -> None:
+    POOL_CHECKOUT_WAIT.observe(_NO_LABELS, seconds)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request Request/Response objects)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+        # (method, route) -> its three histograms, so a request does one dict lookup
+        self._routes: dict[tuple[str, str], tuple[Histogram, Histogram, Histogram]] = {}
+
+    def _route_histograms(self, labels: tuple[str, str]) -> tuple[Histogram, Histogram, Histogram]:
+        hs = self._routes.get(labels)
+        if hs is None:
+            hs = self._routes[labels] = (
+                REQUEST_DURATION.child(labels),
+                REQUEST_DB_QUERIES.child(labels),
+                REQUEST_DB_SECONDS.child(labels),
+            )
+        return hs
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+        acc = [0, 0.0]
+        # (seconds, queries, db seconds) once the last body chunk is sent: background tasks that
+        # run after the response (pixel open writes) count toward neither latency nor the request's DB
+        sent: list[tuple[float, int, float]] = []
+        start = time.perf_counter()
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                sent.append((time.perf_counter() - start, acc[0], acc[1]))
+
+        token = _request_db.set(acc)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed, queries, seconds = sent[0] if sent else (time.perf_counter() - start, acc[0], acc[1])
+            _request_db.reset(token)
+            route = scope.get("route")
+            # Route template, not the raw path, keeps label cardinality bounded
+            labels = (scope["method"], route.path if route is not None else "<unmatched>")
+            duration, db_queries, db_seconds = self._route_histograms(labels)
+            duration.observe(elapsed)
+            db_queries.observe(queries)
+            db_seconds.observe(seconds)
+            REQUESTS.inc((*labels, status[0]))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """Prometheus text exposition format 0.0.4."""
+    out: list[str] = []
+    for m in _HISTOGRAMS:
+        out.append(f"# HELP {m.name} {m.help}")
+        out.append(f"# TYPE {m.name} histogram")
+        for label_values, h in list(m.children.items()):
+            cumulative = 0
+            for bound, n in zip(h.bounds, h.counts):
+                cumulative += n
+                le = 'le="' + _fmt(bound) + '"'
+                out.append(f"{m.name}_bucket{_label_str(m.labels, label_values, le)} {cumulative}")
+            out.append(f"{m.name}_bucket{_label_str(m.labels, label_values, _LE_INF)} {h.count}")
+            out.append(f"{m.name}_sum{_label_str(m.labels, label_values)} {_fmt(h.sum)}")
+            out.append(f"{m.name}_count{_label_str(m.labels, label_values)} {h.count}")
+    for c in _COUNTERS:
+        out.append(f"# HELP {c.name} {c.help}")
+        out.append(f"# TYPE {c.name} counter")
+        for label_values, v in list(c.values.items()):
+            out.append(f"{c.name}{_label_str(c.labels, map(str, label_values))} {v}")
+    for name, help_, metric_type, fn in _GAUGES:
+        out.append(f"# HELP {name} {help_}")
+        out.append(f"# TYPE {name} {metric_type}")
+        out.append(f"{name} {_fmt(fn())}")
+    return "\n".join(out) + "\n"
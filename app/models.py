@@ -1,19 +1,51 @@
 """
-Minimal email engagement: leads + events (open or click only).
+Minimal email engagement: leads + events (open or click only), plus per-campaign rollups.
 All timestamps stored in UTC via DateTime(timezone=True).
 """
 
 from __future__ import annotations
 
+import os
+import time
 import uuid
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any
 
-from sqlalchemy import DateTime, Index, String, func
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Index, SmallInteger, String, false, func, literal_column
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TypeDecorator
 
 from app.database import Base
 
+# events.event_type is stored as a SMALLINT code (migration 011); the API and Python side use names
+EVENT_TYPE_CODES = {"open": 1, "click": 2}
+EVENT_TYPE_NAMES = {code: name for name, code in EVENT_TYPE_CODES.items()}
+
+
+class EventTypeCode(TypeDecorator[str]):
+    """'open' | 'click' in Python, SMALLINT in the database."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> int | None:
+        return None if value is None else EVENT_TYPE_CODES[value]
+
+    def process_result_value(self, value: Any, dialect: Any) -> str | None:
+        return None if value is None else EVENT_TYPE_NAMES[value]
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, then random bits.
+    New keys land at the right edge of the primary key index instead of random pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
 
 class Lead(Base):
     """Lead with optional first-open and first-click timestamps for fast 'opened or not' queries."""
@@ -34,16 +66,120 @@ class Lead(Base):
 
 
 class Event(Base):
-    """Minimal events: event_type is 'open' (pixel) or 'click' (link). No IP, UA, or metadata."""
+    """
+    Minimal events: event_type is 'open' (pixel) or 'click' (link). No IP, UA, or metadata;
+    is_bot marks hits whose User-Agent matched the bot list (kept only with BOT_FILTER=tag).
+    Range-partitioned by month on created_at (migration 009), so created_at is part of the primary key.
+    Append-only and write-heavy, so the row is kept small (migration 011): UUIDv7 ids, SMALLINT
+    event_type, and a BRIN index on created_at instead of btree indexes on type/tracking_id.
+    """
 
     __tablename__ = "events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tracking_id: Mapped[str] = mapped_column(String(128), index=True, nullable=False)
-    event_type: Mapped[str] = mapped_column(String(64), index=True, nullable=False)  # "open" | "click"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    tracking_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    event_type: Mapped[str] = mapped_column(EventTypeCode, nullable=False)  # "open" | "click"
+    is_bot: Mapped[bool] = mapped_column(Boolean, server_default=false(), default=False, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False
     )
 
 
-Index("ix_events_tracking_created", Event.tracking_id, Event.created_at)
+class EventHourlyCount(Base):
+    """
+    Events per (campaign_name, UTC hour, event_type); campaign_name '' when the lead is unknown.
+    Maintained by the statement-level events_hourly_rollup trigger on events (migration 009).
+    """
+
+    __tablename__ = "event_hourly_counts"
+
+    campaign_name: Mapped[str] = mapped_column(String(256), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, index=True)
+    event_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class DailyEventCount(Base):
+    """
+    Events per (UTC day, tracking_id, event_type) for days whose raw events were removed by
+    app.retention. campaign_name is the lead's campaign at compaction time ('' if no lead).
+    """
+
+    __tablename__ = "daily_event_counts"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    tracking_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    event_type: Mapped[str] = mapped_column(EventTypeCode, primary_key=True)
+    campaign_name: Mapped[str] = mapped_column(String(256), server_default="", nullable=False)
+    count: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)  # human events
+    bot_count: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+
+
+class CampaignStats(Base):
+    """
+    Per-campaign engagement rollup. Maintained by the leads_campaign_stats trigger (migration 008)
+    whenever a lead is added/removed, changes campaign, or opened_at/first_click_at flips from NULL.
+    """
+
+    __tablename__ = "campaign_stats"
+
+    campaign_name: Mapped[str] = mapped_column(String(256), primary_key=True)
+    total_leads: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    opened: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    clicked: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+    first_activity_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_activity_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class CampaignRedirect(Base):
+    """
+    Where GET /go/{campaign_name}/... sends the visitor. Campaigns without a row use REDIRECT_BASE_URL.
+    Loaded into memory by app.redirects; a statement trigger (migration 015) notifies every worker on change.
+    """
+
+    __tablename__ = "campaign_redirects"
+
+    campaign_name: Mapped[str] = mapped_column(String(256), primary_key=True)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+# Covers the per-lead timeline (GET /leads/{id}/events): keyset on (created_at, id), index-only
+Index(
+    "ix_events_tracking_created",
+    Event.tracking_id,
+    Event.created_at,
+    Event.id,
+    postgresql_include=["event_type", "is_bot"],
+)
+Index("ix_events_created_brin", Event.created_at, postgresql_using="brin")
+Index("ix_leads_created_id", Lead.created_at, Lead.id)
+Index("ix_daily_event_counts_tracking_day", DailyEventCount.tracking_id, DailyEventCount.day)
+Index("ix_daily_event_counts_campaign_day", DailyEventCount.campaign_name, DailyEventCount.day)
+
+# GET /leads/search matches this text: email, first_name, company and campaign_name, lower-cased and
+# space-separated. ix_leads_search_trgm (pg_trgm GIN, migration 014) indexes exactly this expression,
+# so queries must use it unchanged (literals, not bind parameters, for the separators)
+_NONE = literal_column("''")
+_SEP = literal_column("' '")
+LEAD_SEARCH_TEXT = func.lower(
+    func.coalesce(Lead.email, _NONE)
+    + _SEP
+    + func.coalesce(Lead.first_name, _NONE)
+    + _SEP
+    + func.coalesce(Lead.company, _NONE)
+    + _SEP
+    + func.coalesce(Lead.campaign_name, _NONE)
+)
+# An index on a bare expression is not attached to a table automatically
+Lead.__table__.append_constraint(
+    Index(
+        "ix_leads_search_trgm",
+        LEAD_SEARCH_TEXT.label("search_text"),
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+)
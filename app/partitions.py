@@ -0,0 +1,44 @@
+"""
+Monthly partitions for events (see migration 009).
+
+ensure_event_partitions() calls the SQL function of the same name, which creates any missing
+events_YYYY_MM partitions up to EVENT_PARTITIONS_AHEAD months from now. The app runs it at
+startup and then daily, so inserts never land in events_default. Old months are plain tables:
+ALTER TABLE events DETACH PARTITION events_YYYY_MM (or DROP TABLE) removes them without a DELETE.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+CHECK_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+async def ensure_event_partitions(months_ahead: int | None = None) -> int:
+    """Create missing monthly partitions from this month through months_ahead. Returns how many were created."""
+    months = _settings.event_partitions_ahead if months_ahead is None else months_ahead
+    async with engine.begin() as conn:
+        created = await conn.scalar(text("SELECT ensure_event_partitions(now(), :months)"), {"months": months})
+    if created:
+        logger.info("Created %s event partitions (months_ahead=%s)", created, months)
+    return created or 0
+
+
+async def run_partition_maintenance() -> None:
+    """Background loop: ensure upcoming partitions exist, once a day. Errors are logged and retried next round."""
+    while True:
+        try:
+            await ensure_event_partitions()
+        except Exception:
+            logger.exception("Event partition maintenance failed")
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
@@ -0,0 +1,93 @@
+"""
+Campaign redirect routing for GET /go/{campaign_name}/{tracking_id}.
+
+campaign_redirects is held in memory as an immutable mapping that is replaced with a single
+assignment, so a lookup is one dict get (no DB or file access per click) and a request never
+sees a half-loaded table. Campaigns without a row go to REDIRECT_BASE_URL.
+
+The table is reloaded at startup, right after a change through the admin API, whenever
+Postgres notifies the campaign_redirects channel (statement trigger from migration 015, so
+every worker on every host follows a change), and every REDIRECT_REFRESH_INTERVAL seconds in
+case a notification was missed while the listening connection was down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import get_settings
+from app.database import engine, listen
+from app.models import CampaignRedirect
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+CHANNEL = "campaign_redirects"
+
+_REDIRECTS = CampaignRedirect.__table__
+
+
+class RedirectTable:
+    """campaign_name -> destination URL, swapped atomically on reload."""
+
+    def __init__(self, default_url: str) -> None:
+        self.default_url = default_url
+        self._routes: Mapping[str, str] = MappingProxyType({})
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def resolve(self, campaign_name: str) -> str:
+        return self._routes.get(campaign_name, self.default_url)
+
+    async def load(self) -> int:
+        """Read the whole table and swap it in. Returns the number of routes."""
+        async with engine.connect() as conn:
+            rows = (await conn.execute(select(_REDIRECTS.c.campaign_name, _REDIRECTS.c.url))).all()
+        self._routes = MappingProxyType({name: url for name, url in rows})
+        return len(rows)
+
+
+redirect_table = RedirectTable(_settings.redirect_base_url.rstrip("/"))
+
+
+async def run_redirect_refresh() -> None:
+    """Background loop: reload on notification or every REDIRECT_REFRESH_INTERVAL seconds."""
+    changed = asyncio.Event()
+    listener: AsyncConnection | None = None
+    driver: Any = None
+    try:
+        while True:
+            if driver is None or driver.is_closed():
+                if listener is not None:
+                    await listener.invalidate()
+                    listener = driver = None
+                try:
+                    listener, driver = await listen(CHANNEL, lambda _payload: changed.set())
+                    # Changes made while nobody was listening
+                    changed.set()
+                except Exception:
+                    logger.warning("Cannot LISTEN on %s; reloading on the timer only", CHANNEL, exc_info=True)
+            try:
+                await asyncio.wait_for(changed.wait(), _settings.redirect_refresh_interval)
+            except TimeoutError:
+                pass
+            changed.clear()
+            try:
+                count = await redirect_table.load()
+            except Exception:
+                logger.exception("Campaign redirect reload failed; keeping the current table")
+            else:
+                logger.debug("Campaign redirects reloaded: %d routes", count)
+    finally:
+        if listener is not None:
+            # Not returned to the pool: the listener is registered on it
+            await listener.invalidate()
@@ -0,0 +1,229 @@
+"""
+Event retention: fold raw events older than RETENTION_DAYS into daily_event_counts, then remove them.
+
+- Whole monthly partitions older than the cutoff are aggregated in one statement, then
+  detached and dropped in the same transaction (no row deletes, nothing left to vacuum).
+- The rest (the month the cutoff falls in, events_default) is moved in chunks of
+  RETENTION_CHUNK_SIZE rows: one statement deletes a chunk and adds it to the daily counts,
+  one transaction per chunk, RETENTION_PAUSE seconds between chunks.
+
+Every step commits its aggregate and its delete together, so an interrupted run loses nothing
+and the next run continues with whatever is still in events. leads (opened_at, first_click_at,
+campaign_stats) and event_hourly_counts are never touched. A session advisory lock keeps two
+workers from compacting at once.
+
+Run from the app (RETENTION_DAYS > 0) or as a command:
+    python -m app.retention --days 90 [--chunk-size 5000] [--pause 0.2] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import configure_logging, get_settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+_LOCK_KEY = 0x7265_7465_6E74  # "retent"
+_PARTITION_NAME = re.compile(r"^events_(\d{4})_(\d{2})$")
+
+_FOLD = """
+    INSERT INTO daily_event_counts AS d (day, tracking_id, event_type, campaign_name, count, bot_count)
+    SELECT (m.created_at AT TIME ZONE 'UTC')::date,
+           m.tracking_id,
+           m.event_type,
+           COALESCE(l.campaign_name, ''),
+           COUNT(*) FILTER (WHERE NOT m.is_bot),
+           COUNT(*) FILTER (WHERE m.is_bot)
+    FROM {source} m
+    LEFT JOIN leads l ON l.tracking_id = m.tracking_id
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (day, tracking_id, event_type) DO UPDATE
+    SET count = d.count + EXCLUDED.count,
+        bot_count = d.bot_count + EXCLUDED.bot_count,
+        campaign_name = EXCLUDED.campaign_name
+"""
+# One chunk: delete up to :chunk events in [start, end) and add them to the daily counts
+_MOVE_CHUNK = text(
+    f"""
+    WITH moved AS (
+        DELETE FROM events e
+        WHERE (e.id, e.created_at) IN (
+            SELECT id, created_at FROM events
+            WHERE created_at >= :start AND created_at < :end
+            LIMIT :chunk
+        )
+        RETURNING e.tracking_id, e.event_type, e.created_at, e.is_bot
+    ), folded AS ({_FOLD.format(source="moved")})
+    SELECT COUNT(*) FROM moved
+    """
+)
+
+
+@dataclass(slots=True)
+class RetentionResult:
+    cutoff: datetime
+    events_moved: int = 0
+    partitions_dropped: int = 0
+
+
+def cutoff_for(days: int, now: datetime | None = None) -> datetime:
+    """Start of the UTC day `days` days ago; events before it are compacted."""
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    return datetime.combine(today - timedelta(days=days), time.min, tzinfo=timezone.utc)
+
+
+def _month_bounds(name: str) -> tuple[datetime, datetime] | None:
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    start = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+    end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+async def _partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'events'::regclass ORDER BY c.relname"
+        )
+    )
+    return list(result.scalars())
+
+
+async def _drop_partition(name: str, dry_run: bool) -> int:
+    """Fold a whole old partition into daily counts, detach and drop it. Returns its row count."""
+    async with engine.begin() as conn:
+        if dry_run:
+            return await conn.scalar(text(f'SELECT COUNT(*) FROM "{name}"'))
+        # Fail fast rather than queue inserts behind DETACH's lock on events
+        await conn.execute(text("SET LOCAL lock_timeout = '2s'"))
+        rows = await conn.scalar(text(f'SELECT COUNT(*) FROM "{name}"'))
+        await conn.execute(text(_FOLD.format(source=f'"{name}"')))
+        await conn.execute(text(f'ALTER TABLE events DETACH PARTITION "{name}"'))
+        await conn.execute(text(f'DROP TABLE "{name}"'))
+    logger.info("Retention: compacted and dropped partition %s (%s events)", name, rows)
+    return rows
+
+
+async def _move_range(start: datetime, end: datetime, chunk_size: int, pause: float, dry_run: bool) -> int:
+    """Move events in [start, end) one day and one chunk at a time."""
+    moved = 0
+    day = start
+    while day < end:
+        day_end = min(day + timedelta(days=1), end)
+        if dry_run:
+            async with engine.connect() as conn:
+                moved += await conn.scalar(
+                    text("SELECT COUNT(*) FROM events WHERE created_at >= :start AND created_at < :end"),
+                    {"start": day, "end": day_end},
+                )
+        else:
+            while True:
+                async with engine.begin() as conn:
+                    n = await conn.scalar(_MOVE_CHUNK, {"start": day, "end": day_end, "chunk": chunk_size})
+                moved += n
+                if n < chunk_size:
+                    break
+                await asyncio.sleep(pause)
+        day = day_end
+    return moved
+
+
+async def compact_events(
+    days: int,
+    chunk_size: int | None = None,
+    pause: float | None = None,
+    dry_run: bool = False,
+) -> RetentionResult | None:
+    """
+    Compact events older than `days` days. Returns None if another process holds the retention
+    lock. With dry_run, only counts what would be moved.
+    """
+    chunk_size = chunk_size or _settings.retention_chunk_size
+    pause = _settings.retention_pause if pause is None else pause
+    result = RetentionResult(cutoff=cutoff_for(days))
+    async with engine.connect() as lock_conn:
+        if not await lock_conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": _LOCK_KEY}):
+            logger.info("Retention: another process is compacting, skipping")
+            return None
+        await lock_conn.commit()
+        try:
+            partitions = await _partitions(lock_conn)
+            await lock_conn.commit()
+            for name in partitions:
+                bounds = _month_bounds(name)
+                if bounds is not None and bounds[1] <= result.cutoff:
+                    result.events_moved += await _drop_partition(name, dry_run)
+                    result.partitions_dropped += 1
+                    await asyncio.sleep(pause)
+                elif bounds is not None and bounds[0] < result.cutoff:
+                    result.events_moved += await _move_range(bounds[0], result.cutoff, chunk_size, pause, dry_run)
+                elif bounds is None:
+                    # events_default: only old rows that missed their month, normally none
+                    oldest = await lock_conn.scalar(
+                        text(f'SELECT min(created_at) FROM "{name}" WHERE created_at < :cutoff'),
+                        {"cutoff": result.cutoff},
+                    )
+                    await lock_conn.commit()
+                    if oldest is not None:
+                        start = datetime.combine(oldest.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+                        result.events_moved += await _move_range(start, result.cutoff, chunk_size, pause, dry_run)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+            await lock_conn.commit()
+    logger.info(
+        "Retention%s: %s events before %s, %s partitions dropped",
+        " (dry run)" if dry_run else "",
+        result.events_moved,
+        result.cutoff.isoformat(),
+        result.partitions_dropped,
+    )
+    return result
+
+
+async def run_retention() -> None:
+    """Background loop (RETENTION_DAYS > 0). Errors are logged and retried next round."""
+    while True:
+        try:
+            await compact_events(_settings.retention_days)
+        except Exception:
+            logger.exception("Event retention failed")
+        await asyncio.sleep(_settings.retention_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.retention", description="Compact events older than --days.")
+    parser.add_argument("--days", type=int, default=_settings.retention_days or None, required=not _settings.retention_days)
+    parser.add_argument("--chunk-size", type=int, default=_settings.retention_chunk_size)
+    parser.add_argument("--pause", type=float, default=_settings.retention_pause)
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be compacted")
+    args = parser.parse_args()
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+    configure_logging()
+    logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+    async def _run() -> None:
+        try:
+            await compact_events(args.days, args.chunk_size, args.pause, args.dry_run)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Campaign analytics: GET /campaigns and GET /campaigns/{campaign_name}/stats.
+Reads the campaign_stats rollup (one row per campaign), never scans leads.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import get_read_db
+from app.models import CampaignStats
+from app.schemas import CampaignStatsResponse
+
+router = APIRouter()
+
+_STATS = CampaignStats.__table__
+
+
+def _to_response(stats: Row) -> CampaignStatsResponse:
+    total = stats.total_leads
+    return CampaignStatsResponse(
+        campaign_name=stats.campaign_name,
+        total_leads=total,
+        opened=stats.opened,
+        clicked=stats.clicked,
+        open_rate=round(stats.opened / total, 4) if total else 0.0,
+        click_rate=round(stats.clicked / total, 4) if total else 0.0,
+        first_activity_at=stats.first_activity_at,
+        last_activity_at=stats.last_activity_at,
+    )
+
+
+@router.get(
+    "/campaigns",
+    response_model=list[CampaignStatsResponse],
+    summary="List campaigns with engagement stats",
+    description="Totals, opens, clicks, rates and first/last activity for every campaign with leads, by campaign_name.",
+)
+async def list_campaigns(conn: AsyncConnection = Depends(get_read_db)) -> list[CampaignStatsResponse]:
+    result = await conn.execute(
+        select(_STATS).where(_STATS.c.total_leads > 0).order_by(_STATS.c.campaign_name)
+    )
+    return [_to_response(stats) for stats in result]
+
+
+@router.get(
+    "/campaigns/{campaign_name}/stats",
+    response_model=CampaignStatsResponse,
+    summary="Campaign engagement stats",
+    description="Totals, opens, clicks, rates and first/last activity for one campaign. 404 if it has no leads.",
+)
+async def get_campaign_stats(campaign_name: str, conn: AsyncConnection = Depends(get_read_db)) -> CampaignStatsResponse:
+    result = await conn.execute(select(_STATS).where(_STATS.c.campaign_name == campaign_name))
+    stats = result.first()
+    if stats is None or stats.total_leads <= 0:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return _to_response(stats)
@@ -1,25 +1,50 @@
 """
 POST /events — optional manual event logging (open or click). Minimal: no metadata.
 When event_type is 'open', also set Lead.opened_at for the matching lead (if any).
+
+POST /events/batch — many events per request (JSON array or NDJSON, webhook relays). Items are
+validated one by one and reported per item; the valid ones are written in one transaction with
+two set-based statements (app.ingest.write_event_batch), setting opened_at / first_click_at.
+
+GET /events/histogram — opens/clicks per hour or day, read from event_hourly_counts (never raw events).
 """
 
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
-from app.database import get_db
-from app.models import Event, Lead
-from app.schemas import EventCreate, EventResponse
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.ingest import PendingEvent, write_event_batch
+from app.json_rows import dump
+from app.lead_cache import LeadState, lead_cache, stage_lead_state
+from app.models import Event, EventHourlyCount, Lead
+from app.schemas import EventBatchItem, EventBatchResponse, EventCreate, EventHistogramBucket, EventResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_settings = get_settings()
+
+# Upper bound on the request body, so an oversized batch is refused before it is parsed
+MAX_BATCH_ITEM_BYTES = 1024
+
+# One pydantic-core call validates the whole batch and reports every invalid item
+_BATCH_ITEMS = TypeAdapter(list[EventBatchItem])
+
+# Sender clocks may run this far ahead. Later times would land in events_default and block
+# creation of that month's partition (app/partitions.py).
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
 
 @router.post(
     "/events",
@@ -35,12 +60,198 @@ async def create_event(
     event = Event(tracking_id=body.tracking_id, event_type=body.event_type)
     db.add(event)
     if body.event_type == "open":
-        now = datetime.now(timezone.utc)
-        result = await db.execute(select(Lead).where(Lead.tracking_id == body.tracking_id))
-        lead = result.scalar_one_or_none()
-        if lead is not None and lead.opened_at is None:
-            lead.opened_at = now
+        state = lead_cache.get(body.tracking_id)
+        # Repeat open on a lead already known to be opened: only the event row is written
+        if state is None or not state.opened:
+            now = datetime.now(timezone.utc)
+            result = await db.execute(select(Lead).where(Lead.tracking_id == body.tracking_id))
+            lead = result.scalar_one_or_none()
+            if lead is not None:
+                if lead.opened_at is None:
+                    lead.opened_at = now
+                stage_lead_state(
+                    db,
+                    body.tracking_id,
+                    LeadState(opened=True, clicked=lead.first_click_at is not None, campaign_name=lead.campaign_name),
+                )
     await db.commit()
     await db.refresh(event)
     logger.info("Event created tracking_id=%s type=%s id=%s", body.tracking_id, body.event_type, event.id)
     return EventResponse.model_validate(event)
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Request body over {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _batch_items(body: bytes, ndjson: bool) -> list[Any]:
+    """Decoded items; an NDJSON line that is not JSON becomes None (reported as invalid)."""
+    if not ndjson:
+        try:
+            items = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}") from e
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of events")
+        return items
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            items.append(None)
+    return items
+
+
+def _check_created_at(valid: dict[int, EventBatchItem], errors: dict[int, str], now: datetime) -> None:
+    """
+    Move items whose created_at is later than now + MAX_CLOCK_SKEW or, with RETENTION_DAYS set,
+    older than the retention window from valid to errors, so they are reported like other invalid items.
+    """
+    latest = now + MAX_CLOCK_SKEW
+    earliest = now - timedelta(days=_settings.retention_days) if _settings.retention_days > 0 else None
+    for index, item in list(valid.items()):
+        if item.created_at is None:
+            continue
+        created_at = _as_utc(item.created_at)
+        if created_at > latest:
+            errors[index] = f"created_at: more than {int(MAX_CLOCK_SKEW.total_seconds())}s in the future"
+        elif earliest is not None and created_at < earliest:
+            errors[index] = f"created_at: older than the retention window ({_settings.retention_days} days)"
+        else:
+            continue
+        del valid[index]
+
+
+def _validate_items(items: list[Any]) -> tuple[dict[int, EventBatchItem], dict[int, str]]:
+    """Valid items and error messages (first error per item), both by index."""
+    errors = {i: "invalid JSON" for i, item in enumerate(items) if item is None}
+    while True:
+        indexes = [i for i in range(len(items)) if i not in errors]
+        try:
+            parsed = _BATCH_ITEMS.validate_python([items[i] for i in indexes])
+        except ValidationError as e:
+            for err in e.errors():
+                index, *loc = err["loc"]
+                field = ".".join(str(part) for part in loc)
+                errors.setdefault(indexes[index], f"{field}: {err['msg']}" if field else err["msg"])
+            continue
+        return dict(zip(indexes, parsed)), errors
+
+
+@router.post(
+    "/events/batch",
+    response_model=EventBatchResponse,
+    summary="Log events in bulk",
+    description=(
+        "Store up to EVENT_BATCH_MAX_ITEMS events (default 10000) in one transaction: a JSON array, or NDJSON "
+        "(Content-Type application/x-ndjson, one event per line). Each item is tracking_id, event_type "
+        "('open' or 'click') and optional created_at (default now; naive = UTC). Opens set lead.opened_at and "
+        "clicks set lead.first_click_at on existing leads (earliest wins); no lead is created. Invalid items "
+        "are skipped and reported in results; the rest are stored. A created_at more than 5 minutes in the future "
+        "or older than RETENTION_DAYS makes its item invalid. 413 if the batch is too large."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": EventBatchItem.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def create_events_batch(request: Request, db: AsyncSession = Depends(get_db)) -> Response:
+    max_items = _settings.event_batch_max_items
+    body = await _read_body(request, max_items * MAX_BATCH_ITEM_BYTES)
+    items = _batch_items(body, "ndjson" in request.headers.get("content-type", ""))
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} events per batch")
+
+    valid, errors = _validate_items(items)
+    now = datetime.now(timezone.utc)
+    _check_created_at(valid, errors, now)
+    events: list[PendingEvent] = []
+    results: list[dict[str, Any]] = []
+    for index in range(len(items)):
+        parsed = valid.get(index)
+        if parsed is None:
+            results.append({"index": index, "status": "invalid", "id": None, "error": errors[index]})
+            continue
+        event = PendingEvent(
+            tracking_id=parsed.tracking_id,
+            event_type=parsed.event_type,
+            created_at=_as_utc(parsed.created_at) if parsed.created_at is not None else now,
+        )
+        events.append(event)
+        results.append({"index": index, "status": "created", "id": event.id, "error": None})
+
+    if events:
+        await write_event_batch(db, events)
+        await db.commit()
+    logger.info("Event batch received=%s created=%s", len(items), len(events))
+    return Response(
+        dump(
+            {
+                "received": len(items),
+                "created": len(events),
+                "invalid": len(items) - len(events),
+                "results": results,
+            }
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    "/events/histogram",
+    response_model=list[EventHistogramBucket],
+    summary="Opens and clicks over time",
+    description=(
+        "Opens and clicks per hour or day (UTC) in [from, to), optionally for one campaign_name. "
+        "Defaults to the last 7 days. Reads pre-aggregated hourly counts; buckets without events are omitted."
+    ),
+)
+async def event_histogram(
+    conn: AsyncConnection = Depends(get_read_db),
+    campaign_name: str | None = Query(None, description="Only this campaign (default: all)"),
+    bucket: Literal["hour", "day"] = Query("hour", description="Bucket size"),
+    from_: datetime | None = Query(None, alias="from", description="Start (inclusive), ISO 8601; default to - 7 days"),
+    to: datetime | None = Query(None, description="End (exclusive), ISO 8601; default now"),
+) -> list[EventHistogramBucket]:
+    end = _as_utc(to) if to is not None else datetime.now(timezone.utc)
+    start = _as_utc(from_) if from_ is not None else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+
+    h = EventHourlyCount
+    b = h.bucket if bucket == "hour" else func.timezone("UTC", func.date_trunc("day", func.timezone("UTC", h.bucket)))
+    b = b.label("b")
+    q = (
+        select(
+            b,
+            func.coalesce(func.sum(h.count).filter(h.event_type == literal("open")), 0),
+            func.coalesce(func.sum(h.count).filter(h.event_type == literal("click")), 0),
+        )
+        .where(h.bucket >= start, h.bucket < end)
+        .group_by(b)
+        .order_by(b)
+    )
+    if campaign_name is not None:
+        q = q.where(h.campaign_name == campaign_name)
+    result = await conn.execute(q)
+    return [EventHistogramBucket(bucket=row[0], opens=row[1], clicks=row[2]) for row in result]
+
+
+def _as_utc(dt: datetime) -> datetime:
+    """Naive query datetimes are taken as UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
@@ -0,0 +1,187 @@
+"""
+Bulk export for analysts: GET /export/leads and GET /export/events as CSV (optionally gzipped).
+
+Postgres produces the CSV itself (COPY (SELECT ...) TO STDOUT) and the chunks it sends are
+passed to the response as they arrive, through a small bounded queue, so a slow client slows
+the COPY down instead of filling memory. No row is ever decoded in Python: memory per export
+is a few chunks regardless of row count. The COPY runs on one pooled connection in its own
+transaction with statement_timeout off and TimeZone UTC; if the client goes away, the COPY is
+cancelled and the connection discarded. Exports run on the read replica when one is configured
+and fresh (app/database.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import read_engine_for, read_primary
+from app.models import EVENT_TYPE_CODES
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Fast level: on-the-fly compression of CSV, where level 1 already gets most of the ratio
+GZIP_LEVEL = 1
+# COPY chunks buffered between Postgres and the client
+QUEUE_CHUNKS = 16
+
+_LEADS_SQL = (
+    "SELECT id, tracking_id, email, first_name, company, campaign_name, created_at, opened_at, first_click_at "
+    "FROM leads l"
+)
+_EVENT_TYPE_NAME = "CASE e.event_type {} END".format(
+    " ".join(f"WHEN {code} THEN '{name}'" for name, code in EVENT_TYPE_CODES.items())
+)
+_EVENTS_SQL = (
+    f"SELECT e.id, e.tracking_id, {_EVENT_TYPE_NAME} AS event_type, e.created_at, e.is_bot, l.campaign_name "
+    "FROM events e LEFT JOIN leads l ON l.tracking_id = e.tracking_id"
+)
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    """Naive query datetimes are taken as UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt is not None and dt.tzinfo is None else dt
+
+
+def _filtered(
+    sql: str, alias: str, campaign_name: str | None, start: datetime | None, end: datetime | None
+) -> tuple[str, list[Any]]:
+    """Append the WHERE clause for the given filters; args are $n parameters in order."""
+    conditions: list[str] = []
+    args: list[Any] = []
+    if campaign_name is not None:
+        args.append(campaign_name)
+        conditions.append(f"l.campaign_name = ${len(args)}::text")
+    if start is not None:
+        args.append(start)
+        conditions.append(f"{alias}.created_at >= ${len(args)}::timestamptz")
+    if end is not None:
+        args.append(end)
+        conditions.append(f"{alias}.created_at < ${len(args)}::timestamptz")
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql, args
+
+
+# Connection releases still running after their request was cancelled
+_releasing: set[asyncio.Task[None]] = set()
+
+
+async def _release(conn: AsyncConnection, copy: asyncio.Task[str] | None) -> None:
+    if copy is not None and not copy.done():
+        # Client disconnected mid-COPY: the connection is mid-protocol, so it is not reused
+        copy.cancel()
+        with suppress(BaseException):
+            await copy
+        await conn.invalidate()
+    await conn.close()
+
+
+async def _copy_csv(sql: str, args: list[Any], gzip: bool, primary: bool) -> AsyncIterator[bytes]:
+    """Stream COPY (sql) TO STDOUT as CSV with a header row, gzip-compressed if asked."""
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=QUEUE_CHUNKS)
+    compressor = zlib.compressobj(GZIP_LEVEL, wbits=31) if gzip else None
+    conn = await read_engine_for(primary).connect()
+    copy: asyncio.Task[str] | None = None
+    try:
+        await conn.execute(text("SET LOCAL statement_timeout = 0"))
+        await conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+        driver = (await conn.get_raw_connection()).driver_connection
+
+        async def sink(chunk: bytearray) -> None:
+            await queue.put(bytes(chunk))
+
+        async def run() -> str:
+            try:
+                return await driver.copy_from_query(sql, *args, output=sink, format="csv", header=True)
+            finally:
+                await queue.put(None)
+
+        copy = asyncio.create_task(run(), name="export-copy")
+        while (chunk := await queue.get()) is not None:
+            yield compressor.compress(chunk) if compressor is not None else chunk
+        status = await copy
+        if compressor is not None:
+            yield compressor.flush()
+        logger.info("Export finished: %s", status)
+    finally:
+        # In its own task: on disconnect the request is being cancelled, which would interrupt it
+        release = asyncio.create_task(_release(conn, copy))
+        _releasing.add(release)
+        release.add_done_callback(_releasing.discard)
+        await asyncio.shield(release)
+
+
+def _export_response(sql: str, args: list[Any], name: str, gzip: bool, primary: bool) -> StreamingResponse:
+    filename = f"{name}.csv.gz" if gzip else f"{name}.csv"
+    return StreamingResponse(
+        _copy_csv(sql, args, gzip, primary),
+        media_type="application/gzip" if gzip else "text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _check_range(start: datetime | None, end: datetime | None) -> None:
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+
+
+@router.get(
+    "/export/leads",
+    response_class=StreamingResponse,
+    summary="Export leads (CSV)",
+    description=(
+        "All leads as CSV with a header row (id, tracking_id, email, first_name, company, campaign_name, "
+        "created_at, opened_at, first_click_at; times in UTC), streamed straight from Postgres COPY. "
+        "Filters: campaign_name, and [from, to) on created_at (ISO 8601; naive = UTC). gzip=true sends leads.csv.gz."
+    ),
+    responses={200: {"content": {"text/csv": {}, "application/gzip": {}}}},
+)
+async def export_leads(
+    campaign_name: str | None = Query(None, max_length=256, description="Only this campaign"),
+    from_: datetime | None = Query(None, alias="from", description="created_at at or after (ISO 8601)"),
+    to: datetime | None = Query(None, description="created_at before (ISO 8601)"),
+    gzip: bool = Query(False, description="gzip-compress the CSV"),
+    primary: bool = Depends(read_primary),
+) -> StreamingResponse:
+    from_, to = _utc(from_), _utc(to)
+    _check_range(from_, to)
+    sql, args = _filtered(_LEADS_SQL, "l", campaign_name, from_, to)
+    return _export_response(sql, args, "leads", gzip, primary)
+
+
+@router.get(
+    "/export/events",
+    response_class=StreamingResponse,
+    summary="Export events (CSV)",
+    description=(
+        "Raw events as CSV with a header row (id, tracking_id, event_type, created_at, is_bot, campaign_name of "
+        "the lead; times in UTC), streamed straight from Postgres COPY. Filters: campaign_name (of the lead), and "
+        "[from, to) on created_at (ISO 8601; naive = UTC). Events already compacted by retention are not included. "
+        "gzip=true sends events.csv.gz."
+    ),
+    responses={200: {"content": {"text/csv": {}, "application/gzip": {}}}},
+)
+async def export_events(
+    campaign_name: str | None = Query(None, max_length=256, description="Only events of leads in this campaign"),
+    from_: datetime | None = Query(None, alias="from", description="created_at at or after (ISO 8601)"),
+    to: datetime | None = Query(None, description="created_at before (ISO 8601)"),
+    gzip: bool = Query(False, description="gzip-compress the CSV"),
+    primary: bool = Depends(read_primary),
+) -> StreamingResponse:
+    from_, to = _utc(from_), _utc(to)
+    _check_range(from_, to)
+    sql, args = _filtered(_EVENTS_SQL, "e", campaign_name, from_, to)
+    return _export_response(sql, args, "events", gzip, primary)
@@ -1,26 +1,69 @@
 """
-Leads API: GET all, GET by id, GET by email/tracking_id, POST (lead_id OR email only one), DELETE.
+Leads API: GET (keyset-paged), GET /leads/stream (NDJSON), GET by id, GET by email/tracking_id,
+GET /leads/search (pg_trgm, ranked), GET /leads/{id}/events (timeline, keyset-paged) and /events/summary,
+POST (lead_id OR email only one), POST /leads/bulk (CSV/NDJSON import), DELETE.
 """
 
 from __future__ import annotations
 
+import base64
 import logging
+import re
 import uuid
+from collections.abc import AsyncIterator
 from datetime import date, datetime, time, timezone
+from typing import Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import REAL, DateTime, Select, cast, func, literal, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
-from app.database import get_db
-from app.models import Lead
-from app.schemas import LeadCreate, LeadResponse
+from app.bulk_import import IMPORT_BATCH_SIZE, ImportCounts, ImportFormatError, import_batch, iter_records, to_staging_row
+from app.config import get_settings
+from app.database import get_db, get_read_db, read_engine_for, read_primary
+from app.json_rows import dump_ndjson, dump_row, dump_rows
+from app.lead_cache import lead_cache
+from app.models import LEAD_SEARCH_TEXT, DailyEventCount, Event, Lead
+from app.schemas import (
+    BulkImportResponse,
+    EventResponse,
+    LeadCreate,
+    LeadEventSummary,
+    LeadResponse,
+    LeadSearchResult,
+)
 
 logger = logging.getLogger(__name__)
 
+_settings = get_settings()
+
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+STREAM_BATCH_SIZE = 1000
+DEFAULT_EVENTS_PAGE_SIZE = 100
+MAX_EVENTS_PAGE_SIZE = 1000
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+# Trigram index lookups need at least one full trigram; shorter terms would scan the whole index
+MIN_SEARCH_LENGTH = 3
+
+# Columns behind LeadResponse, in its field order; reads encode these rows directly (app.json_rows)
+LEAD_COLUMNS = (
+    Lead.id,
+    Lead.tracking_id,
+    Lead.campaign_name,
+    Lead.email,
+    Lead.created_at,
+    Lead.opened_at,
+    Lead.first_click_at,
+)
+# All in ix_events_tracking_created (key or INCLUDE), so a timeline page is an index-only scan
+EVENT_COLUMNS = (Event.id, Event.tracking_id, Event.event_type, Event.created_at, Event.is_bot)
+
 
 def _date_start_utc(d: date) -> datetime:
     return datetime.combine(d, time.min, tzinfo=timezone.utc)
@@ -30,23 +73,15 @@ def _date_end_utc(d: date) -> datetime:
     return datetime.combine(d, time(23, 59, 59, 999999), tzinfo=timezone.utc)
 
 
-@router.get(
-    "/leads",
-    response_model=list[LeadResponse],
-    summary="Get all leads",
-    description="List all leads. Optional filters: email, tracking_id, from_date, to_date (filter by created_at).",
-)
-async def list_leads(
-    db: AsyncSession = Depends(get_db),
-    email: str | None = Query(None, description="Filter by email"),
-    tracking_id: str | None = Query(None, description="Filter by tracking_id (lead_id)"),
-    from_date: date | None = Query(None, description="Filter leads created on or after this date (YYYY-MM-DD)"),
-    to_date: date | None = Query(None, description="Filter leads created on or before this date (YYYY-MM-DD)"),
-) -> list[LeadResponse]:
+def _apply_filters(
+    q: Select[Any],
+    email: str | None,
+    tracking_id: str | None,
+    from_date: date | None,
+    to_date: date | None,
+) -> Select[Any]:
     if from_date is not None and to_date is not None and from_date > to_date:
         raise HTTPException(status_code=400, detail="from_date must be on or before to_date")
-
-    q = select(Lead).order_by(Lead.created_at.desc())
     if email is not None and email.strip():
         q = q.where(Lead.email == email.strip())
     if tracking_id is not None and tracking_id.strip():
@@ -55,9 +90,158 @@ async def list_leads(
         q = q.where(Lead.created_at >= _date_start_utc(from_date))
     if to_date is not None:
         q = q.where(Lead.created_at <= _date_end_utc(to_date))
-    result = await db.execute(q)
-    leads = result.scalars().all()
-    return [LeadResponse.model_validate(lead) for lead in leads]
+    return q
+
+
+def _encode_cursor(created_at: datetime, lead_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{lead_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, lead_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(lead_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+@router.get(
+    "/leads",
+    response_model=list[LeadResponse],
+    summary="Get leads (paged)",
+    description=(
+        "List leads, newest first, one page at a time. Optional filters: email, tracking_id, from_date, to_date "
+        "(filter by created_at). When more leads exist, the X-Next-Cursor response header holds the cursor "
+        "for the next page; pass it back as ?cursor=. Use GET /leads/stream to read everything."
+    ),
+)
+async def list_leads(
+    conn: AsyncConnection = Depends(get_read_db),
+    email: str | None = Query(None, description="Filter by email"),
+    tracking_id: str | None = Query(None, description="Filter by tracking_id (lead_id)"),
+    from_date: date | None = Query(None, description="Filter leads created on or after this date (YYYY-MM-DD)"),
+    to_date: date | None = Query(None, description="Filter leads created on or before this date (YYYY-MM-DD)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+) -> Response:
+    q = _apply_filters(select(*LEAD_COLUMNS), email, tracking_id, from_date, to_date)
+    if cursor:
+        after_created_at, after_id = _decode_cursor(cursor)
+        q = q.where(tuple_(Lead.created_at, Lead.id) < tuple_(after_created_at, after_id))
+    q = q.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit + 1)
+    rows = (await conn.execute(q)).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    return Response(dump_rows(rows), media_type="application/json", headers=headers)
+
+
+async def _stream_ndjson(q: Select[Any], primary: bool) -> AsyncIterator[bytes]:
+    # Own connection: a request-scoped one is closed before a streaming body is sent
+    async with read_engine_for(primary).connect() as conn:
+        result = await conn.stream(q.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield dump_ndjson(rows)
+
+
+@router.get(
+    "/leads/stream",
+    response_class=StreamingResponse,
+    summary="Stream all leads (NDJSON)",
+    description=(
+        "All matching leads, newest first, as newline-delimited JSON (one LeadResponse per line). "
+        "Rows are read through a server-side cursor in batches, so memory stays flat for any table size. "
+        "Same filters as GET /leads."
+    ),
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def stream_leads(
+    email: str | None = Query(None, description="Filter by email"),
+    tracking_id: str | None = Query(None, description="Filter by tracking_id (lead_id)"),
+    from_date: date | None = Query(None, description="Filter leads created on or after this date (YYYY-MM-DD)"),
+    to_date: date | None = Query(None, description="Filter leads created on or before this date (YYYY-MM-DD)"),
+    primary: bool = Depends(read_primary),
+) -> StreamingResponse:
+    q = _apply_filters(select(*LEAD_COLUMNS), email, tracking_id, from_date, to_date)
+    q = q.order_by(Lead.created_at.desc(), Lead.id.desc())
+    return StreamingResponse(_stream_ndjson(q, primary), media_type="application/x-ndjson")
+
+
+def _encode_search_cursor(score: float, lead_id: UUID) -> str:
+    raw = f"{score!r}|{lead_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, lead_id = raw.split("|", 1)
+        return float(score), UUID(lead_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def _regex_literal(term: str) -> str:
+    # Postgres ARE: a backslash before a non-alphanumeric character makes it literal
+    return re.sub(r"([^\w\s])", r"\\\1", term)
+
+
+def search_query(term: str, match: str, limit: int, after: tuple[float, UUID] | None = None) -> Select[Any]:
+    """Leads matching a lower-cased term, best first; after = (score, id) of the previous page's last row."""
+    # Both conditions are served by ix_leads_search_trgm; the score only ranks what they matched
+    if match == "prefix":
+        condition = LEAD_SEARCH_TEXT.regexp_match(f"(^| ){_regex_literal(term)}")
+    else:
+        condition = LEAD_SEARCH_TEXT.bool_op("%>")(term)
+    # Pages come from the SEARCH_MAX_CANDIDATES best matches (a top-N sort, so a broad term keeps
+    # a bounded result set). Ordered like the pages themselves, so every request of a paging run
+    # sees the same candidates and the (score, id) cursor neither skips nor repeats a lead
+    score = func.word_similarity(term, LEAD_SEARCH_TEXT).label("score")
+    candidates = (
+        select(*LEAD_COLUMNS, score)
+        .where(condition)
+        .order_by(score.desc(), Lead.id.desc())
+        .limit(_settings.search_max_candidates)
+        .subquery("candidates")
+    )
+    query = select(candidates)
+    if after is not None:
+        query = query.where(tuple_(candidates.c.score, candidates.c.id) < tuple_(cast(after[0], REAL), after[1]))
+    return query.order_by(candidates.c.score.desc(), candidates.c.id.desc()).limit(limit)
+
+
+@router.get(
+    "/leads/search",
+    response_model=list[LeadSearchResult],
+    summary="Search leads",
+    description=(
+        "Search email, first_name, company and campaign_name (case-insensitive, at least 3 characters). "
+        "match=prefix finds leads where a word of those fields starts with q; match=fuzzy (default) also "
+        "tolerates typos and partial words (pg_trgm word similarity of at least 0.6). Best matches first "
+        "(score, then newest id) among the SEARCH_MAX_CANDIDATES best matches (default 2000; refine a broad "
+        "term to see others); when more exist, the X-Next-Cursor response header holds the cursor for ?cursor=."
+    ),
+)
+async def search_leads(
+    q: str = Query(..., min_length=MIN_SEARCH_LENGTH, max_length=100, description="Search term"),
+    match: Literal["fuzzy", "prefix"] = Query("fuzzy", description="fuzzy or prefix (word starts with q)"),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE, description="Page size"),
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    conn: AsyncConnection = Depends(get_read_db),
+) -> Response:
+    term = q.strip().lower()
+    if len(term) < MIN_SEARCH_LENGTH:
+        raise HTTPException(status_code=400, detail=f"q must have at least {MIN_SEARCH_LENGTH} non-blank characters")
+    after = _decode_search_cursor(cursor) if cursor else None
+    rows = (await conn.execute(search_query(term, match, limit + 1, after))).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_search_cursor(rows[-1].score, rows[-1].id)
+    return Response(dump_rows(rows), media_type="application/json", headers=headers)
 
 
 @router.get(
@@ -68,13 +252,92 @@ async def list_leads(
 )
 async def get_lead_by_id(
     lead_id: UUID,
-    db: AsyncSession = Depends(get_db),
-) -> LeadResponse:
-    result = await db.execute(select(Lead).where(Lead.id == lead_id))
-    lead = result.scalar_one_or_none()
-    if lead is None:
+    conn: AsyncConnection = Depends(get_read_db),
+) -> Response:
+    result = await conn.execute(select(*LEAD_COLUMNS).where(Lead.id == lead_id))
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return LeadResponse.model_validate(lead)
+    return Response(dump_row(row), media_type="application/json")
+
+
+async def _lead_tracking_id(conn: AsyncConnection, lead_id: UUID) -> str:
+    tracking_id = await conn.scalar(select(Lead.tracking_id).where(Lead.id == lead_id))
+    if tracking_id is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return tracking_id
+
+
+@router.get(
+    "/leads/{lead_id}/events",
+    response_model=list[EventResponse],
+    summary="Get lead events (paged)",
+    description=(
+        "The lead's opens and clicks, newest first, one page at a time. Bot hits are left out unless "
+        "include_bots=true. When more events exist, the X-Next-Cursor response header holds the cursor for "
+        "the next page; pass it back as ?cursor=. Events removed by retention are only in /events/summary."
+    ),
+)
+async def list_lead_events(
+    lead_id: UUID,
+    conn: AsyncConnection = Depends(get_read_db),
+    include_bots: bool = Query(False, description="Include events from bot User-Agents"),
+    limit: int = Query(DEFAULT_EVENTS_PAGE_SIZE, ge=1, le=MAX_EVENTS_PAGE_SIZE, description="Page size"),
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+) -> Response:
+    tracking_id = await _lead_tracking_id(conn, lead_id)
+    q = select(*EVENT_COLUMNS).where(Event.tracking_id == tracking_id)
+    if not include_bots:
+        q = q.where(~Event.is_bot)
+    if cursor:
+        after_created_at, after_id = _decode_cursor(cursor)
+        q = q.where(tuple_(Event.created_at, Event.id) < tuple_(after_created_at, after_id))
+    q = q.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit + 1)
+    rows = (await conn.execute(q)).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    return Response(dump_rows(rows), media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/leads/{lead_id}/events/summary",
+    response_model=LeadEventSummary,
+    summary="Get lead engagement summary",
+    description=(
+        "Human (non-bot) open and click counts with first/last timestamps, in one aggregate query over the "
+        "lead's raw events and its daily counts from retention (timestamps of compacted days are the UTC day start)."
+    ),
+)
+async def get_lead_event_summary(
+    lead_id: UUID,
+    conn: AsyncConnection = Depends(get_read_db),
+) -> LeadEventSummary:
+    tracking_id = await _lead_tracking_id(conn, lead_id)
+    raw = select(Event.event_type, literal(1).label("n"), Event.created_at.label("at")).where(
+        Event.tracking_id == tracking_id, ~Event.is_bot
+    )
+    compacted = select(
+        DailyEventCount.event_type,
+        DailyEventCount.count,
+        func.timezone("UTC", cast(DailyEventCount.day, DateTime())),
+    ).where(DailyEventCount.tracking_id == tracking_id, DailyEventCount.count > 0)
+    u = union_all(raw, compacted).subquery()
+    is_open, is_click = u.c.event_type == "open", u.c.event_type == "click"
+    row = (
+        await conn.execute(
+            select(
+                func.coalesce(func.sum(u.c.n).filter(is_open), 0).label("opens"),
+                func.coalesce(func.sum(u.c.n).filter(is_click), 0).label("clicks"),
+                func.min(u.c.at).filter(is_open).label("first_open_at"),
+                func.max(u.c.at).filter(is_open).label("last_open_at"),
+                func.min(u.c.at).filter(is_click).label("first_click_at"),
+                func.max(u.c.at).filter(is_click).label("last_click_at"),
+            )
+        )
+    ).one()
+    return LeadEventSummary(tracking_id=tracking_id, **row._mapping)
 
 
 @router.post(
@@ -123,6 +386,68 @@ async def create_lead(
     return LeadResponse.model_validate(lead)
 
 
+@router.post(
+    "/leads/bulk",
+    response_model=BulkImportResponse,
+    summary="Bulk import leads (CSV or NDJSON)",
+    description=(
+        "Streamed upload of leads, one per line. CSV needs a header row; NDJSON is one JSON object per line. "
+        "Fields: lead_id (or tracking_id), email, campaign_name, first_name, company; each row needs lead_id or email. "
+        "Rows whose tracking_id or email already exists are counted as conflicts and skipped. "
+        "Format comes from ?format= or the Content-Type (text/csv, application/x-ndjson)."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def bulk_import_leads(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    format: Literal["csv", "ndjson"] | None = Query(None, description="Upload format; defaults from Content-Type"),
+    campaign_name: str | None = Query(None, max_length=256, description="campaign_name for rows that have none"),
+) -> BulkImportResponse:
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "json" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(status_code=415, detail="Use Content-Type text/csv or application/x-ndjson, or ?format=")
+
+    counts = ImportCounts()
+    batch: list[tuple] = []
+    try:
+        async for record in iter_records(request.stream(), format):
+            counts.received += 1
+            row = to_staging_row(record, counts.received, campaign_name) if record is not None else None
+            if row is None:
+                counts.invalid += 1
+                continue
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                counts.accepted += await import_batch(db, batch)
+                batch = []
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if batch:
+        counts.accepted += await import_batch(db, batch)
+    counts.conflicts = counts.received - counts.invalid - counts.accepted
+    logger.info(
+        "Bulk import received=%s accepted=%s conflicts=%s invalid=%s",
+        counts.received,
+        counts.accepted,
+        counts.conflicts,
+        counts.invalid,
+    )
+    return BulkImportResponse(
+        received=counts.received, accepted=counts.accepted, conflicts=counts.conflicts, invalid=counts.invalid
+    )
+
+
 @router.delete(
     "/leads/{lead_id}",
     status_code=204,
@@ -139,4 +464,5 @@ async def delete_lead(
         raise HTTPException(status_code=404, detail="Lead not found")
     await db.delete(lead)
     await db.commit()
+    lead_cache.invalidate(lead.tracking_id)
     logger.info("Lead deleted id=%s", lead_id)
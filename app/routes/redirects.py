@@ -0,0 +1,87 @@
+"""
+Campaign redirect admin API: list, get, set (PUT) and remove the /go destination per campaign_name.
+Changes take effect in this worker immediately and in the others on the change notification (app/redirects.py).
+Reads stay on the primary (get_conn, not the read replica): admin tools read back right after a change.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.database import get_conn, get_db
+from app.models import CampaignRedirect
+from app.redirects import redirect_table
+from app.schemas import CampaignRedirectResponse, CampaignRedirectUpsert
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_REDIRECTS = CampaignRedirect.__table__
+
+
+@router.get(
+    "/campaign-redirects",
+    response_model=list[CampaignRedirectResponse],
+    summary="List campaign redirects",
+    description="Every campaign with its own /go destination, by campaign_name. Other campaigns go to REDIRECT_BASE_URL.",
+)
+async def list_redirects(conn: AsyncConnection = Depends(get_conn)) -> list[CampaignRedirectResponse]:
+    result = await conn.execute(select(_REDIRECTS).order_by(_REDIRECTS.c.campaign_name))
+    return [CampaignRedirectResponse.model_validate(row) for row in result]
+
+
+@router.get(
+    "/campaign-redirects/{campaign_name}",
+    response_model=CampaignRedirectResponse,
+    summary="Get campaign redirect",
+    description="The /go destination for one campaign. 404 if the campaign uses REDIRECT_BASE_URL.",
+)
+async def get_redirect(campaign_name: str, conn: AsyncConnection = Depends(get_conn)) -> CampaignRedirectResponse:
+    row = (await conn.execute(select(_REDIRECTS).where(_REDIRECTS.c.campaign_name == campaign_name))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="No redirect for this campaign")
+    return CampaignRedirectResponse.model_validate(row)
+
+
+@router.put(
+    "/campaign-redirects/{campaign_name}",
+    response_model=CampaignRedirectResponse,
+    summary="Set campaign redirect",
+    description="Create or replace the /go destination for a campaign. Applies to the next click in every worker.",
+)
+async def set_redirect(
+    campaign_name: str,
+    body: CampaignRedirectUpsert,
+    db: AsyncSession = Depends(get_db),
+) -> CampaignRedirectResponse:
+    stmt = pg_insert(_REDIRECTS).values(campaign_name=campaign_name, url=body.url)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[_REDIRECTS.c.campaign_name],
+        set_={"url": stmt.excluded.url, "updated_at": stmt.excluded.updated_at},
+    ).returning(_REDIRECTS)
+    row = (await db.execute(stmt)).one()
+    await db.commit()
+    await redirect_table.load()
+    logger.info("Campaign redirect set campaign_name=%s url=%s", campaign_name, body.url)
+    return CampaignRedirectResponse.model_validate(row)
+
+
+@router.delete(
+    "/campaign-redirects/{campaign_name}",
+    status_code=204,
+    summary="Remove campaign redirect",
+    description="The campaign goes back to REDIRECT_BASE_URL. Returns 404 if it had no redirect.",
+)
+async def delete_redirect(campaign_name: str, db: AsyncSession = Depends(get_db)) -> None:
+    result = await db.execute(delete(_REDIRECTS).where(_REDIRECTS.c.campaign_name == campaign_name))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="No redirect for this campaign")
+    await db.commit()
+    await redirect_table.load()
+    logger.info("Campaign redirect removed campaign_name=%s", campaign_name)
@@ -1,6 +1,17 @@
 """
-Single tracking endpoint: GET /go/{campaign_name}/{tracking_id} — record click, then redirect.
-Creates a new lead if none exists (lead_id + campaign + first_click_at from URL).
+Tracking endpoints:
+- GET /go/{campaign_name}/{tracking_id} — record click, then redirect to the campaign's URL
+  (campaign_redirects, held in memory by app/redirects.py) or REDIRECT_BASE_URL.
+- GET /o/{tracking_id}.png (or .gif) — open pixel; 1x1 image from a module constant, open written after the response.
+
+/go creates a new lead if none exists (lead_id + campaign + first_click_at from URL) in the same
+statement that inserts the event, so concurrent first clicks on one link cannot collide.
+With INGEST_MODE=queue clicks and opens are queued for the background writer and the response is immediate.
+With DEDUP_WINDOW set, repeat hits within the window are answered without writing (app/dedup.py).
+Hits from bot User-Agents (app/utils.py) never update the lead: with BOT_FILTER=tag the event is
+stored with is_bot=true, with BOT_FILTER=drop nothing is written.
+While Postgres is unreachable, clicks and opens go to the disk spool (app/spool.py) and /go
+still redirects; the spooled hits are replayed once the database is back.
 """
 
 from __future__ import annotations
@@ -8,19 +19,43 @@ from __future__ import annotations
 import logging
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, Path
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
+from app import dedup, metrics
 from app.config import get_settings
 from app.database import get_db
-from app.models import Event, Lead
+from app.ingest import PendingEvent, flush_events, ingest_queue, record_click, spool_events
+from app.redirects import redirect_table
+from app.spool import database_down, database_unavailable, mark_down
+from app.utils import is_bot_user_agent
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_settings = get_settings()
+
+BOT_HITS = metrics.counter("bot_hits_total", "Clicks/opens from bot User-Agents.", ("event_type",))
+
+# 1x1 transparent images, built once; pixel responses reuse these bytes and headers
+PIXEL_PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
+    b"\x00\x00\x00\x0bIDATx\xdac`\x00\x02\x00\x00\x05\x00\x01\xe9\xfa\xdc\xd8\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00"
+    b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+# No caching anywhere (browser, proxy, mail image proxy) so every open reaches us
+_PIXEL_HEADERS = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
 
 @router.get(
     "/go/{campaign_name}/{tracking_id}",
@@ -28,38 +63,96 @@ router = APIRouter()
     status_code=302,
     summary="Tracking link",
     description=(
-        "Record click with campaign name, then redirect to REDIRECT_BASE_URL. "
+        "Record click with campaign name, then redirect to the campaign's URL (see /campaign-redirects), "
+        "or REDIRECT_BASE_URL if it has none. "
         "If no lead exists with this tracking_id, a new lead is created (tracking_id, campaign_name, first_click_at). "
         "Example: /go/dubai/001. "
         "Swagger 'Execute' may show 'Failed to fetch' (browser blocks cross-origin redirect); test in address bar or with curl."
     ),
-    responses={302: {"description": "Redirect to REDIRECT_BASE_URL"}},
+    responses={302: {"description": "Redirect to the campaign's URL or REDIRECT_BASE_URL"}},
 )
 async def track_click(
-    campaign_name: str,
-    tracking_id: str,
+    campaign_name: str = Path(..., max_length=256),
+    tracking_id: str = Path(..., max_length=128),
     db: AsyncSession = Depends(get_db),
+    user_agent: str | None = Header(None),
 ) -> RedirectResponse:
-    event = Event(tracking_id=tracking_id, event_type="click")
-    db.add(event)
-    now = datetime.now(timezone.utc)
-    result = await db.execute(select(Lead).where(Lead.tracking_id == tracking_id))
-    lead = result.scalar_one_or_none()
-    if lead is None:
-        lead = Lead(
-            tracking_id=tracking_id,
-            campaign_name=campaign_name or None,
-            email="",
-            first_click_at=now,
-        )
-        db.add(lead)
-        logger.info("Lead created from /go tracking_id=%s campaign_name=%s", tracking_id, campaign_name)
-    else:
-        if lead.first_click_at is None:
-            lead.first_click_at = now
-        if campaign_name and (lead.campaign_name is None or lead.campaign_name != campaign_name):
-            lead.campaign_name = campaign_name
-    await db.commit()
+    redirect = RedirectResponse(url=redirect_table.resolve(campaign_name), status_code=302)
+    is_bot = _is_bot(user_agent, "click")
+    if is_bot and _settings.bot_filter == "drop":
+        return redirect
+    click = PendingEvent(
+        tracking_id=tracking_id,
+        event_type="click",
+        created_at=datetime.now(timezone.utc),
+        campaign_name=campaign_name,
+        is_bot=is_bot,
+    )
+    if dedup.seen_on_host(tracking_id, "click", is_bot):
+        return redirect
+    if ingest_queue.running and await ingest_queue.submit(click):
+        return redirect
+    if database_down():
+        spool_events([click])
+        return redirect
+    try:
+        if await dedup.seen_in_cluster(db, tracking_id, "click", click.created_at, is_bot):
+            return redirect
+        await record_click(db, click)
+        await db.commit()
+    except Exception as exc:
+        if not database_unavailable(exc):
+            raise
+        mark_down(exc)
+        spool_events([click])
+        return redirect
     logger.info("Click recorded tracking_id=%s campaign_name=%s", tracking_id, campaign_name)
-    settings = get_settings()
-    return RedirectResponse(url=settings.redirect_base_url.rstrip("/"), status_code=302)
+    return redirect
+
+
+def _is_bot(user_agent: str | None, event_type: str) -> bool:
+    if _settings.bot_filter == "off" or not is_bot_user_agent(user_agent):
+        return False
+    BOT_HITS.inc((event_type,))
+    return True
+
+
+async def _record_open(tracking_id: str, user_agent: str | None) -> BackgroundTask | None:
+    """Queue the open, or return a task that writes it after the response is sent."""
+    is_bot = _is_bot(user_agent, "open")
+    if (is_bot and _settings.bot_filter == "drop") or dedup.seen_on_host(tracking_id, "open", is_bot):
+        return None
+    event = PendingEvent(
+        tracking_id=tracking_id, event_type="open", created_at=datetime.now(timezone.utc), is_bot=is_bot
+    )
+    if ingest_queue.running and await ingest_queue.submit(event):
+        return None
+    return BackgroundTask(flush_events, [event])
+
+
+@router.get(
+    "/o/{tracking_id}.png",
+    response_class=Response,
+    summary="Open pixel (PNG)",
+    description="Record an open for tracking_id and return a 1x1 transparent PNG. The write never delays the image.",
+    responses={200: {"content": {"image/png": {}}, "description": "1x1 transparent PNG"}},
+)
+async def open_pixel_png(
+    tracking_id: str = Path(..., max_length=128), user_agent: str | None = Header(None)
+) -> Response:
+    background = await _record_open(tracking_id, user_agent)
+    return Response(PIXEL_PNG, media_type="image/png", headers=_PIXEL_HEADERS, background=background)
+
+
+@router.get(
+    "/o/{tracking_id}.gif",
+    response_class=Response,
+    summary="Open pixel (GIF)",
+    description="Record an open for tracking_id and return a 1x1 transparent GIF. The write never delays the image.",
+    responses={200: {"content": {"image/gif": {}}, "description": "1x1 transparent GIF"}},
+)
+async def open_pixel_gif(
+    tracking_id: str = Path(..., max_length=128), user_agent: str | None = Header(None)
+) -> Response:
+    background = await _record_open(tracking_id, user_agent)
+    return Response(PIXEL_GIF, media_type="image/gif", headers=_PIXEL_HEADERS, background=background)
@@ -5,6 +5,7 @@ Pydantic v2 schemas for request/response validation.
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field, model_validator
@@ -21,10 +22,58 @@ class EventResponse(BaseModel):
     tracking_id: str
     event_type: str
     created_at: datetime
+    is_bot: bool = False
 
     model_config = {"from_attributes": True}
 
 
+# ----- POST /events/batch -----
+class EventBatchItem(EventCreate):
+    """One event of a batch. created_at defaults to the time of the request; naive values are UTC."""
+
+    created_at: datetime | None = None
+
+
+class EventBatchItemResult(BaseModel):
+    """Outcome for the item at index (0-based position in the array / NDJSON data lines)."""
+
+    index: int
+    status: Literal["created", "invalid"]
+    id: UUID | None = Field(None, description="Event id, when created")
+    error: str | None = Field(None, description="Why the item was rejected, when invalid")
+
+
+class EventBatchResponse(BaseModel):
+    """received = created + invalid; results has one entry per item, in order."""
+
+    received: int
+    created: int
+    invalid: int
+    results: list[EventBatchItemResult]
+
+
+# ----- GET /events/histogram -----
+class EventHistogramBucket(BaseModel):
+    """Opens and clicks in one hour or day (bucket = start, UTC)."""
+
+    bucket: datetime
+    opens: int
+    clicks: int
+
+
+# ----- GET /leads/{id}/events/summary -----
+class LeadEventSummary(BaseModel):
+    """Human (non-bot) opens/clicks for one lead, including days compacted by retention (day precision)."""
+
+    tracking_id: str
+    opens: int
+    clicks: int
+    first_open_at: datetime | None = None
+    last_open_at: datetime | None = None
+    first_click_at: datetime | None = None
+    last_click_at: datetime | None = None
+
+
 # ----- POST /leads -----
 class LeadCreate(BaseModel):
     campaign_name: str | None = Field(None, max_length=256)
@@ -54,3 +103,49 @@ class LeadResponse(BaseModel):
     first_click_at: datetime | None = None  # when they clicked the tracking link
 
     model_config = {"from_attributes": True}
+
+
+# ----- GET /leads/search -----
+class LeadSearchResult(LeadResponse):
+    """A lead matching the search, with its pg_trgm word_similarity to the query (0–1, higher is closer)."""
+
+    score: float
+
+
+# ----- POST /leads/bulk -----
+class BulkImportResponse(BaseModel):
+    """Per-upload counts: received = data lines read; accepted + conflicts + invalid = received."""
+
+    received: int
+    accepted: int
+    conflicts: int = Field(..., description="Rows skipped because the tracking_id or email already exists")
+    invalid: int = Field(..., description="Rows that could not be parsed or lack both lead_id and email")
+
+
+# ----- GET /campaigns -----
+class CampaignStatsResponse(BaseModel):
+    """Engagement for one campaign_name. Rates are opened/total_leads and clicked/total_leads (0 when empty)."""
+
+    campaign_name: str
+    total_leads: int
+    opened: int
+    clicked: int
+    open_rate: float
+    click_rate: float
+    first_activity_at: datetime | None = None
+    last_activity_at: datetime | None = None
+
+
+# ----- /campaign-redirects -----
+class CampaignRedirectUpsert(BaseModel):
+    url: str = Field(..., max_length=2048, pattern=r"^https?://\S+$", description="Absolute http(s) URL")
+
+
+class CampaignRedirectResponse(BaseModel):
+    """Where GET /go/{campaign_name}/... redirects for this campaign."""
+
+    campaign_name: str
+    url: str
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
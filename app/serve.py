@@ -0,0 +1,80 @@
+"""
+Production run mode: uvicorn with one worker process per available CPU.
+
+    python -m app.serve [--workers N] [--host HOST] [--port PORT]
+
+Workers default to WEB_WORKERS, or (0) the CPUs this process may use: the affinity mask,
+capped by a cgroup v2 CPU quota when running in a container. uvicorn's supervisor restarts
+workers that die.
+
+Each worker opens its pool connections and prepares the batch write statements during
+startup (DB_POOL_WARM), before /health/ready reports ready. On SIGTERM/SIGINT the supervisor
+signals every worker; a worker closes its listening socket, waits up to SHUTDOWN_TIMEOUT seconds
+for in-flight requests (and their background tasks), then flushes the ingest queue in the app
+lifespan and exits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+
+import uvicorn
+
+from app.config import configure_logging, get_settings
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by the cgroup v2 quota (cpu.max) if one is set."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def worker_count(configured: int) -> int:
+    return configured if configured > 0 else available_cpus()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Run the app with multiple workers.")
+    parser.add_argument("--workers", type=int, default=_settings.web_workers, help="0 = one per available CPU")
+    parser.add_argument("--host", default=_settings.host)
+    parser.add_argument("--port", type=int, default=_settings.port)
+    args = parser.parse_args()
+
+    configure_logging()
+    workers = worker_count(args.workers)
+    logger.info(
+        "Starting %d workers on %s:%d; up to %d database connections in total",
+        workers,
+        args.host,
+        args.port,
+        workers * (_settings.db_pool_size + _settings.db_max_overflow),
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=_settings.log_level.lower(),
+        timeout_graceful_shutdown=_settings.shutdown_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Local disk spool for tracking events while Postgres is unreachable.
+
+When an event write fails because the database cannot be reached, the tracking routes and the
+ingest writer append the event here instead (app/ingest.py), so /go still redirects and the
+hit is kept. After the first such failure the database is marked down and later hits go
+straight to the spool without trying it, until the replayer's probe succeeds again: during an
+outage a click costs a buffer append, not a connect timeout.
+
+Format: each worker appends to its own segment file SPOOL_DIR/<time_ns>-<pid>.spool. A record
+is a frame header (payload length, crc32 of the payload) followed by the payload (one event
+as JSON). Appends go to an in-memory buffer; every SPOOL_FLUSH_INTERVAL seconds the buffer is
+written with os.write and the file fsynced once, so a hard crash loses at most that interval.
+A segment is closed once it reaches SPOOL_SEGMENT_BYTES (or when the replayer wants it) and
+the next append starts a new one. A torn or corrupt frame ends the segment on read.
+
+The writer holds an exclusive flock on its open segment; a segment that can be flocked is
+closed (or its writer died) and may be replayed. The replayer keeps that lock while it loads
+the segment and deletes the file only after its events are committed. Records it cannot
+replay (undecodable, or rejected by the database for a reason other than an outage) are
+appended to <segment>.bad as JSON lines, which are never replayed, and the replay goes on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+import orjson
+from sqlalchemy import exc as sa_exc
+
+from app import metrics
+from app.config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments are not locked, so run a single worker there
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_settings = get_settings()
+
+_FRAME = struct.Struct("<II")  # payload length, crc32(payload)
+_SUFFIX = ".spool"
+_BAD_SUFFIX = ".bad"
+# Appends past this many buffered bytes are written without waiting for the timer
+_WRITE_AHEAD = 1 << 20
+
+# What a write raises when Postgres cannot be reached (refused/reset socket, connection lost
+# mid-query, server shutting down, pool checkout timeout); anything else is a bug, not an outage
+DATABASE_UNAVAILABLE = (OSError, TimeoutError, sa_exc.OperationalError, sa_exc.InterfaceError, sa_exc.TimeoutError)
+# SQLSTATE prefixes of a server that is there but cannot serve the write: connection exceptions
+# (class 08), query_canceled (57014, e.g. statement_timeout on a degraded primary) and
+# admin/crash/immediate shutdown (57P0x). asyncpg raises these as errors SQLAlchemy wraps in a
+# plain DBAPIError, so they are told apart from rejected data by code, not by class
+_UNAVAILABLE_SQLSTATES = ("08", "57014", "57P0")
+
+
+def database_unavailable(exc: BaseException) -> bool:
+    """True if exc means Postgres cannot serve writes right now (spool them), not that it rejects the data."""
+    if isinstance(exc, DATABASE_UNAVAILABLE):
+        return True
+    sqlstate = getattr(getattr(exc, "orig", exc), "sqlstate", None)
+    return isinstance(sqlstate, str) and sqlstate.startswith(_UNAVAILABLE_SQLSTATES)
+
+
+SPOOLED = metrics.counter(
+    "spool_events_total", "Events written to / replayed from / quarantined by the disk spool.", ("direction",)
+)
+
+
+class Spool:
+    """Append-only segment writer for one process."""
+
+    def __init__(self, directory: str, segment_bytes: int, flush_interval: float) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._fd: int | None = None
+        self._path: str | None = None
+        self._size = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """True if this process has spooled events that are not in a closed segment yet."""
+        return bool(self._buffer) or self._size > 0
+
+    def append(self, record: dict[str, Any]) -> None:
+        payload = orjson.dumps(record)
+        self._buffer += _FRAME.pack(len(payload), zlib.crc32(payload))
+        self._buffer += payload
+        SPOOLED.inc(("written",))
+        if len(self._buffer) >= _WRITE_AHEAD and self._fd is not None:
+            self._write()
+
+    async def flush(self) -> None:
+        """Write the buffer and fsync the segment; close it once it is full."""
+        async with self._lock:
+            if not self._buffer:
+                return
+            fd = self._open()
+            self._write()
+            await asyncio.to_thread(os.fsync, fd)
+            if self._size >= self.segment_bytes:
+                self._close()
+
+    async def rotate(self) -> None:
+        """Flush and close the open segment, so it can be replayed."""
+        await self.flush()
+        async with self._lock:
+            self._close()
+
+    async def run(self) -> None:
+        """Background loop: flush every SPOOL_FLUSH_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError:
+                logger.exception("Spool write failed; %d bytes still buffered", len(self._buffer))
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{time.time_ns():020d}-{os.getpid()}{_SUFFIX}")
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd, self._path, self._size = fd, path, 0
+            logger.warning("Spooling events to %s", path)
+        return self._fd
+
+    def _write(self) -> None:
+        assert self._fd is not None
+        view = memoryview(self._buffer)
+        written = 0
+        while written < len(view):
+            written += os.write(self._fd, view[written:])
+        view.release()
+        self._size += written
+        self._buffer.clear()
+
+    def _close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # releases the flock: the segment is now replayable
+            logger.info("Spool segment closed: %s (%d bytes)", self._path, self._size)
+            self._fd = self._path = None
+            self._size = 0
+
+
+def segments(directory: str) -> list[str]:
+    """Spool segment paths, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, n) for n in sorted(names) if n.endswith(_SUFFIX)]
+
+
+def claim(path: str) -> int | None:
+    """Open a segment and lock it for replay. None if its writer (or another replayer) holds it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:  # replayed by another worker meanwhile
+        return None
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+    if os.fstat(fd).st_nlink == 0:  # deleted after we listed it
+        os.close(fd)
+        return None
+    return fd
+
+
+def read_records(fd: int, path: str) -> Iterator[dict[str, Any]]:
+    """Decode a claimed segment's records up to the first torn or corrupt frame."""
+    with os.fdopen(os.dup(fd), "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, pos)
+        payload = data[pos + _FRAME.size : pos + _FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        pos += _FRAME.size + length
+        try:
+            record = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            # Intact frame, bad payload: passed on as-is so the replayer quarantines it
+            record = {"raw": payload.decode(errors="replace")}
+        yield record
+    if pos < len(data):
+        logger.warning("Spool segment %s: ignoring %d unreadable bytes at offset %d", path, len(data) - pos, pos)
+
+
+def quarantine(path: str, records: list[dict[str, Any]]) -> None:
+    """Append records of a segment that cannot be replayed to <segment>.bad, one JSON object per line."""
+    bad_path = path[: -len(_SUFFIX)] + _BAD_SUFFIX
+    with open(bad_path, "ab") as f:
+        for record in records:
+            f.write(orjson.dumps(record) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+    SPOOLED.inc(("quarantined",), len(records))
+    logger.error("Moved %d spooled events to %s", len(records), bad_path)
+
+
+# Outage state for this process: set by the first failed write, cleared by the replayer's probe
+_down_since: float | None = None
+
+
+def database_down() -> bool:
+    return _down_since is not None
+
+
+def mark_down(exc: BaseException) -> None:
+    global _down_since
+    if _down_since is None:
+        _down_since = time.monotonic()
+        logger.error("Database unavailable (%s); spooling tracking events to %s", exc, spool.directory)
+
+
+def mark_up() -> None:
+    global _down_since
+    if _down_since is not None:
+        logger.warning("Database reachable again after %.1fs; replaying spooled events", time.monotonic() - _down_since)
+        _down_since = None
+
+
+spool = Spool(_settings.spool_dir, _settings.spool_segment_bytes, _settings.spool_flush_interval)
@@ -7,10 +7,22 @@ Bot filtering is necessary in B2B email campaigns because:
 - Inflated click counts from bots skew conversion metrics and waste budget.
 - Backend tracking is more reliable than email-tool tracking because we control
   the server, log the exact request (IP, UA, time), and can filter before storing.
+
+The substring list (plus BOT_UA_PATTERNS) is compiled into one regex alternation, so a
+User-Agent is scanned once; verdicts are memoized per distinct User-Agent string, which is
+what makes real traffic (few distinct UAs) cheap.
 """
 
 from __future__ import annotations
 
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+from app.config import get_settings
+
+_settings = get_settings()
+
 # Substrings that indicate bot/crawler traffic (case-insensitive)
 BOT_UA_SUBSTRINGS = (
     "bot",
@@ -21,12 +33,28 @@ BOT_UA_SUBSTRINGS = (
 )
 
 
+def build_bot_matcher(substrings: Iterable[str]) -> re.Pattern[str]:
+    """
+    One alternation over the lower-cased substrings (longest first); search lower-cased text.
+    (re.IGNORECASE makes the scan several times slower than lowering the string first.)
+    """
+    alternatives = sorted({s.strip().lower() for s in substrings if s.strip()}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)))
+
+
+_BOT_UA_RE = build_bot_matcher((*BOT_UA_SUBSTRINGS, *_settings.bot_ua_patterns.split(",")))
+
+
+@lru_cache(maxsize=_settings.bot_ua_cache_size)
+def _is_bot(user_agent: str) -> bool:
+    return _BOT_UA_RE.search(user_agent.lower()) is not None
+
+
 def is_bot_user_agent(user_agent: str | None) -> bool:
     """Return True if the request appears to be from a bot/crawler."""
-    if not user_agent or not user_agent.strip():
+    if not user_agent or user_agent.isspace():
         return False
-    ua_lower = user_agent.lower()
-    return any(sub in ua_lower for sub in BOT_UA_SUBSTRINGS)
+    return _is_bot(user_agent)
 
 
 def get_client_ip(forwarded_for: str | None, remote_host: str | None) -> str | None:
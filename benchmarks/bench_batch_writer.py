@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-request commits vs batched flushes for click/open ingestion.
+
+Writes the same synthetic events twice against DATABASE_URL (migrated schema required):
+  per-request  one session per event: INSERT event, SELECT lead, UPDATE/INSERT lead, COMMIT
+  batched      app.ingest.write_events over batches of --batch-size, one COMMIT per batch
+
+Rows are created under a random tracking_id prefix and deleted afterwards. Rollup tables
+(campaign_stats, event_hourly_counts) still count the benchmark's opens on unknown leads,
+so point DATABASE_URL at a scratch database.
+
+Usage: python benchmarks/bench_batch_writer.py --events 5000 --batch-size 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import delete, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.ingest import PendingEvent, write_events  # noqa: E402
+from app.models import Event, EventHourlyCount, Lead  # noqa: E402
+
+
+def make_events(prefix: str, n: int, leads: int) -> list[PendingEvent]:
+    rng = random.Random(42)
+    out = []
+    for _ in range(n):
+        tracking_id = f"{prefix}{rng.randrange(leads)}"
+        event_type = "click" if rng.random() < 0.3 else "open"
+        out.append(
+            PendingEvent(
+                tracking_id=tracking_id,
+                event_type=event_type,
+                created_at=datetime.now(timezone.utc),
+                campaign_name="bench" if event_type == "click" else None,
+            )
+        )
+    return out
+
+
+async def per_request(events: list[PendingEvent]) -> None:
+    """The original route logic: one ORM session and commit per event."""
+    for e in events:
+        async with AsyncSessionLocal() as db:
+            db.add(Event(tracking_id=e.tracking_id, event_type=e.event_type, created_at=e.created_at))
+            result = await db.execute(select(Lead).where(Lead.tracking_id == e.tracking_id))
+            lead = result.scalar_one_or_none()
+            if e.event_type == "click":
+                if lead is None:
+                    db.add(Lead(tracking_id=e.tracking_id, campaign_name=e.campaign_name, email="", first_click_at=e.created_at))
+                elif lead.first_click_at is None:
+                    lead.first_click_at = e.created_at
+            elif lead is not None and lead.opened_at is None:
+                lead.opened_at = e.created_at
+            await db.commit()
+
+
+async def batched(events: list[PendingEvent], batch_size: int) -> None:
+    for i in range(0, len(events), batch_size):
+        async with AsyncSessionLocal() as db:
+            await write_events(db, events[i : i + batch_size])
+            await db.commit()
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Event).where(Event.tracking_id.startswith(prefix)))
+        await db.execute(delete(Lead).where(Lead.tracking_id.startswith(prefix)))
+        await db.execute(delete(EventHourlyCount).where(EventHourlyCount.campaign_name == "bench"))
+        await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--leads", type=int, default=1000, help="distinct tracking_ids the events hit")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    for name in ("per-request", "batched"):
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        events = make_events(prefix, args.events, args.leads)
+        start = time.perf_counter()
+        try:
+            if name == "per-request":
+                await per_request(events)
+            else:
+                await batched(events, args.batch_size)
+            elapsed = time.perf_counter() - start
+        finally:
+            await cleanup(prefix)
+        print(f"{name:12s} {args.events} events in {elapsed:.2f}s  {args.events / elapsed:,.0f} events/s")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Webhook ingestion throughput: POST /events (one event per request) vs POST /events/batch.
+
+Starts the app with uvicorn (one worker, DATABASE_URL from the environment, migrated schema
+required), creates --leads leads, then sends --events open/click events for them:
+
+  single  POST /events, --concurrency requests in flight
+  batch   POST /events/batch with --batch-size events per request (JSON array), same concurrency
+  ndjson  the same batches as application/x-ndjson
+
+and reports events/s and request latency for each. Leads and events are created under a random
+tracking_id prefix and deleted afterwards; hourly rollups remain, so use a scratch database.
+
+Usage: python benchmarks/bench_event_batch.py --events 100000 --batch-size 1000 --concurrency 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from harness import ROOT, free_port, percentile
+
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models import Event, Lead  # noqa: E402
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {**os.environ, "ENVIRONMENT": "production", "LOG_LEVEL": "WARNING"}
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not start")
+        await asyncio.sleep(0.1)
+
+
+async def run(client: httpx.AsyncClient, requests: list[dict], concurrency: int) -> tuple[list[float], float, int]:
+    latencies: list[float] = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(kwargs: dict) -> None:
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            r = await client.post(**kwargs)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code not in (200, 201):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(kw) for kw in requests))
+    return sorted(latencies), time.perf_counter() - start, errors
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--single-events", type=int, default=5000, help="events sent one per request")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--leads", type=int, default=10_000)
+    args = parser.parse_args()
+
+    prefix = f"evb-{uuid.uuid4().hex[:8]}-"
+    port = free_port()
+    server = start_server(port)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            await wait_ready(client)
+            leads = "".join(json.dumps({"lead_id": f"{prefix}{i}"}) + "\n" for i in range(args.leads))
+            await client.post("/leads/bulk", content=leads, headers={"content-type": "application/x-ndjson"})
+
+            def event(i: int) -> dict:
+                return {"tracking_id": f"{prefix}{i % args.leads}", "event_type": "click" if i % 4 == 0 else "open"}
+
+            single = [{"url": "/events", "json": event(i)} for i in range(args.single_events)]
+            batches = [
+                [event(i) for i in range(lo, min(lo + args.batch_size, args.events))]
+                for lo in range(0, args.events, args.batch_size)
+            ]
+            scenarios = {
+                "single": (single, args.single_events),
+                "batch": ([{"url": "/events/batch", "json": b} for b in batches], args.events),
+                "ndjson": (
+                    [
+                        {
+                            "url": "/events/batch",
+                            "content": "".join(json.dumps(e) + "\n" for e in b),
+                            "headers": {"content-type": "application/x-ndjson"},
+                        }
+                        for b in batches
+                    ],
+                    args.events,
+                ),
+            }
+            for name, (requests, events) in scenarios.items():
+                latencies, elapsed, errors = await run(client, requests, args.concurrency)
+                print(
+                    f"{name:7s} {events / elapsed:9,.0f} events/s  {len(requests):6d} requests  "
+                    f"p50 {percentile(latencies, 0.50) * 1000:7.1f}ms  "
+                    f"p95 {percentile(latencies, 0.95) * 1000:7.1f}ms  errors {errors}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Event).where(Event.tracking_id.startswith(prefix)))
+            await db.execute(delete(Lead).where(Lead.tracking_id.startswith(prefix)))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
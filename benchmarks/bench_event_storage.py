@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+events row layout: insert rate and table/index size, old vs compact.
+
+  uuid4-varchar    id uuid4, event_type varchar(64) + btree(event_type), btree(tracking_id),
+                   btree(tracking_id, created_at)   (layout up to migration 010)
+  uuid7-smallint   id UUIDv7 (time-ordered), event_type smallint, btree(tracking_id, created_at),
+                   BRIN(created_at)                  (migration 011)
+
+Both tables are plain (unpartitioned) copies in a throwaway schema, filled with the same rows
+via INSERT ... SELECT FROM unnest(...) batches, like app.ingest.write_events. The schema is
+dropped afterwards. Needs DATABASE_URL; does not touch the app's tables.
+
+Usage: python benchmarks/bench_event_storage.py --rows 1000000 --batch-size 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models import EVENT_TYPE_CODES, uuid7  # noqa: E402
+
+SCHEMA = "bench_event_storage"
+
+LAYOUTS = {
+    "uuid4-varchar": (
+        """
+        CREATE TABLE {t} (
+            id uuid NOT NULL PRIMARY KEY, tracking_id varchar(128) NOT NULL,
+            event_type varchar(64) NOT NULL, created_at timestamptz NOT NULL, is_bot boolean NOT NULL DEFAULT false
+        );
+        CREATE INDEX ON {t} (event_type);
+        CREATE INDEX ON {t} (tracking_id);
+        CREATE INDEX ON {t} (tracking_id, created_at)
+        """,
+        "uuid[], varchar[], varchar[], timestamptz[]",
+    ),
+    "uuid7-smallint": (
+        """
+        CREATE TABLE {t} (
+            id uuid NOT NULL PRIMARY KEY, tracking_id varchar(128) NOT NULL,
+            event_type smallint NOT NULL, created_at timestamptz NOT NULL, is_bot boolean NOT NULL DEFAULT false
+        );
+        CREATE INDEX ON {t} (tracking_id, created_at);
+        CREATE INDEX ON {t} USING brin (created_at)
+        """,
+        "uuid[], varchar[], smallint[], timestamptz[]",
+    ),
+}
+
+
+async def run_layout(name: str, rows: list[tuple[str, str, datetime]], batch_size: int) -> tuple[float, int, int, int]:
+    ddl, types = LAYOUTS[name]
+    table = f"{SCHEMA}.{name.replace('-', '_')}"
+    id_type, _, type_type, _ = (s.strip() for s in types.split(","))
+    insert = text(
+        f"INSERT INTO {table} (id, tracking_id, event_type, created_at) "
+        f"SELECT * FROM unnest(CAST(:ids AS {id_type}), CAST(:tids AS varchar[]), "
+        f"CAST(:types AS {type_type}), CAST(:ats AS timestamptz[]))"
+    )
+    compact = name == "uuid7-smallint"
+    async with engine.begin() as conn:
+        for stmt in ddl.format(t=table).split(";"):
+            await conn.execute(text(stmt))
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i : i + batch_size]
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert,
+                {
+                    "ids": [uuid7() if compact else uuid.uuid4() for _ in batch],
+                    "tids": [r[0] for r in batch],
+                    "types": [EVENT_TYPE_CODES[r[1]] if compact else r[1] for r in batch],
+                    "ats": [r[2] for r in batch],
+                },
+            )
+    elapsed = time.perf_counter() - start
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM ANALYZE {table}"))
+        heap = (await conn.execute(text(f"SELECT pg_table_size('{table}')"))).scalar()
+        indexes = (await conn.execute(text(f"SELECT pg_indexes_size('{table}')"))).scalar()
+        pkey = (await conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')"))).scalar()
+    return elapsed, heap, indexes, pkey
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--leads", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    step = timedelta(days=30) / args.rows
+    rows = [
+        (f"lead-{rng.randrange(args.leads)}", "open" if rng.random() < 0.7 else "click", start + step * i)
+        for i in range(args.rows)
+    ]
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    try:
+        for name in LAYOUTS:
+            elapsed, heap, indexes, pkey = await run_layout(name, rows, args.batch_size)
+            print(
+                f"{name:15s} {args.rows / elapsed:10,.0f} rows/s  table {heap / 2**20:7.1f} MiB  "
+                f"indexes {indexes / 2**20:7.1f} MiB (pkey {pkey / 2**20:6.1f})  total {(heap + indexes) / 2**20:7.1f} MiB"
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
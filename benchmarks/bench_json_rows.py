@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+GET /leads response encoding: Pydantic models vs orjson from Core rows (no HTTP).
+
+  pydantic   LeadResponse.model_validate per row, then FastAPI's response_model pass
+             (validate the list again, dump to JSON bytes)       (before)
+  orjson     app.json_rows.dump_rows on the same rows            (now)
+
+Rows come from Postgres (generate_series shaped like LEAD_COLUMNS, so asyncpg's own UUID and
+datetime types are what gets encoded); no table is read or written. Both outputs are checked
+to be byte-identical. Needs DATABASE_URL.
+
+Usage: python benchmarks/bench_json_rows.py --sizes 10000,100000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.json_rows import dump_rows  # noqa: E402
+from app.schemas import LeadResponse  # noqa: E402
+
+ROWS = text(
+    """
+    SELECT gen_random_uuid() AS id, 'lead-' || g AS tracking_id,
+           CASE WHEN g % 3 = 0 THEN NULL ELSE 'campaign-' || g % 20 END AS campaign_name,
+           'lead-' || g || '@bench.test' AS email,
+           now() - g * interval '1 second' AS created_at,
+           CASE WHEN g % 2 = 0 THEN now() - g * interval '1 second' + interval '5 minutes' END AS opened_at,
+           CASE WHEN g % 5 = 0 THEN now() - g * interval '1 second' + interval '9 minutes' END AS first_click_at
+    FROM generate_series(1, :n) AS g
+    """
+)
+
+_LIST = TypeAdapter(list[LeadResponse])
+
+
+def pydantic_path(rows) -> bytes:
+    models = [LeadResponse.model_validate(row) for row in rows]
+    return _LIST.dump_json(_LIST.validate_python(models))
+
+
+def best_of(fn, rows, repeat: int) -> tuple[float, bytes]:
+    best, out = float("inf"), b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated response sizes (rows)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size; the best is reported")
+    args = parser.parse_args()
+
+    try:
+        for n in (int(s) for s in args.sizes.split(",")):
+            async with engine.connect() as conn:
+                rows = (await conn.execute(ROWS, {"n": n})).all()
+            slow, expected = best_of(pydantic_path, rows, args.repeat)
+            fast, body = best_of(dump_rows, rows, args.repeat)
+            same = "identical" if body == expected else "DIFFERENT"
+            print(
+                f"{n:>8,} rows  pydantic {slow * 1e3:8.1f} ms  orjson {fast * 1e3:7.1f} ms  "
+                f"x{slow / fast:5.1f}  {len(body) / 2**20:6.1f} MiB  output {same}"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
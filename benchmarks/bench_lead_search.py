@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+GET /leads/search latency on a large leads table (target: under 50 ms per page).
+
+Copies the leads table layout, indexes included (so ix_leads_search_trgm; run migrations
+first), into a throwaway schema, fills it with --leads synthetic leads (names, companies,
+campaigns, emails built from them), then runs app.routes.leads.search_query for a mix of
+terms in both match modes: exact names, email fragments, misspellings, and a second page via
+the keyset cursor. Prints p50/p95/max per mode and the plan of one query. The schema is
+dropped afterwards. Needs DATABASE_URL and a Postgres with pg_trgm (not pgserver; see migration 014).
+
+Usage: python benchmarks/bench_lead_search.py --leads 1000000 --runs 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.routes.leads import DEFAULT_SEARCH_PAGE_SIZE, search_query  # noqa: E402
+
+SCHEMA = "bench_lead_search"
+
+FIRST = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+         "Aisha", "Mohammed", "Wei", "Priya", "Carlos", "Fatima", "Yuki", "Olga", "Kwame", "Ingrid")
+LAST = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+        "Khan", "Chen", "Patel", "Silva", "Nakamura", "Ivanova", "Mensah", "Larsen", "Okafor", "Haddad")
+COMPANIES = ("Acme", "Globex", "Initech", "Umbrella", "Stark Industries", "Wayne Enterprises", "Hooli",
+             "Vandelay", "Soylent", "Tyrell", "Cyberdyne", "Wonka", "Aperture", "Massive Dynamic")
+DOMAINS = ("gmail.com", "outlook.com", "yahoo.com", "proton.me", "company.io", "mail.ae")
+
+FILL = text(
+    f"""
+    INSERT INTO {SCHEMA}.leads (id, tracking_id, email, first_name, company, campaign_name, created_at)
+    SELECT gen_random_uuid(), 'bench-' || g,
+           lower(f || '.' || l) || g || '@' || d, f, c, 'Campaign ' || (g % 50), now() - g * interval '1 second'
+    FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS g,
+         LATERAL (SELECT (CAST(:first AS text[]))[1 + (g * 7) % :nf] AS f,
+                         (CAST(:last AS text[]))[1 + (g * 13) % :nl] AS l,
+                         (CAST(:companies AS text[]))[1 + (g * 17) % :nc] AS c,
+                         (CAST(:domains AS text[]))[1 + (g * 3) % :nd] AS d) AS pick
+    """
+)
+
+
+def terms(rng: random.Random) -> list[tuple[str, str]]:
+    """(match, term) pairs: names and companies as typed, email fragments, and typos for fuzzy."""
+    out = []
+    for _ in range(50):
+        first, last, company = rng.choice(FIRST), rng.choice(LAST), rng.choice(COMPANIES)
+        out.append(("prefix", rng.choice((first, last, company))[: rng.randint(3, 6)].lower()))
+        out.append(("prefix", f"{first}.{last}".lower()))
+        out.append(("fuzzy", f"{first} {last}".lower()))
+        word = rng.choice((last, company)).lower()
+        i = rng.randrange(1, len(word) - 1)
+        out.append(("fuzzy", word[:i] + word[i + 1 :]))  # one letter dropped
+    return out
+
+
+def summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e3  # noqa: E731
+    return f"p50 {p(0.5):6.1f} ms  p95 {p(0.95):6.1f} ms  max {samples[-1] * 1e3:6.1f} ms  ({len(samples)} queries)"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200, help="queries per match mode")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_SEARCH_PAGE_SIZE)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"CREATE TABLE {SCHEMA}.leads (LIKE public.leads INCLUDING ALL)"))
+        has_index = await conn.scalar(
+            text("SELECT count(*) FROM pg_indexes WHERE schemaname = :s AND indexdef LIKE '%gin_trgm_ops%'"),
+            {"s": SCHEMA},
+        )
+        if not has_index:
+            raise SystemExit("leads has no pg_trgm index; run `alembic upgrade head` first")
+    try:
+        start = time.perf_counter()
+        arrays = {"first": list(FIRST), "last": list(LAST), "companies": list(COMPANIES), "domains": list(DOMAINS)}
+        sizes = {"nf": len(FIRST), "nl": len(LAST), "nc": len(COMPANIES), "nd": len(DOMAINS)}
+        for lo in range(1, args.leads + 1, 100_000):
+            async with engine.begin() as conn:
+                await conn.execute(FILL, {"start": lo, "stop": min(lo + 99_999, args.leads), **arrays, **sizes})
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.leads"))
+        print(f"seeded {args.leads:,} leads in {time.perf_counter() - start:.0f}s")
+
+        rng = random.Random(5)
+        pool = terms(rng)
+        timings: dict[str, list[float]] = {"prefix": [], "fuzzy": [], "page 2": []}
+        async with engine.connect() as conn:
+            # Unqualified `leads` in the app's query now resolves to the bench table
+            await conn.execute(text(f"SET search_path = {SCHEMA}, public"))
+            for mode in ("prefix", "fuzzy"):
+                candidates = [t for m, t in pool if m == mode]
+                for i in range(args.runs):
+                    term = candidates[i % len(candidates)]
+                    t0 = time.perf_counter()
+                    rows = (await conn.execute(search_query(term, mode, args.page_size + 1))).all()
+                    timings[mode].append(time.perf_counter() - t0)
+                    if len(rows) > args.page_size and len(timings["page 2"]) < args.runs:
+                        last = rows[args.page_size - 1]
+                        t0 = time.perf_counter()
+                        await conn.execute(search_query(term, mode, args.page_size + 1, (last.score, last.id)))
+                        timings["page 2"].append(time.perf_counter() - t0)
+            for name, samples in timings.items():
+                if samples:
+                    print(f"{name:7s} {summary(samples)}")
+
+            example = search_query("jonson", "fuzzy", args.page_size + 1)
+            sql = str(example.compile(dialect=asyncpg_dialect(), compile_kwargs={"literal_binds": True}))
+            plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF) {sql}"))).scalars().all()
+            print("\nfuzzy 'jonson':\n  " + "\n  ".join(plan))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of app.metrics instrumentation.
+
+Calls a trivial ASGI app directly (no server, no DB) with and without MetricsMiddleware and
+reports the difference in microseconds per request. Also times the per-statement work the
+SQLAlchemy cursor hooks do (one histogram observation plus the per-request accumulator).
+
+Usage: python benchmarks/bench_metrics_overhead.py --requests 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import metrics  # noqa: E402
+
+_START = {"type": "http.response.start", "status": 200, "headers": []}
+_BODY = {"type": "http.response.body", "body": b"ok"}
+_ROUTE = SimpleNamespace(path="/go/{campaign_name}/{tracking_id}")
+
+
+async def bare_app(scope: dict, receive, send) -> None:
+    scope["route"] = _ROUTE  # what Starlette's router sets on a match
+    await send(_START)
+    await send(_BODY)
+
+
+async def _receive() -> dict:
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message: dict) -> None:
+    pass
+
+
+async def run(app, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await app({"type": "http", "method": "GET", "path": "/go/c/t"}, _receive, _send)
+    return time.perf_counter() - start
+
+
+def per_statement(n: int) -> float:
+    """What after_cursor_execute adds per statement inside a request."""
+    token = metrics._request_db.set([0, 0.0])
+    start = time.perf_counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        elapsed = time.perf_counter() - t0
+        metrics.DB_QUERY_DURATION.observe(metrics._NO_LABELS, elapsed)
+        acc = metrics._request_db.get()
+        acc[0] += 1
+        acc[1] += elapsed
+    total = time.perf_counter() - start
+    metrics._request_db.reset(token)
+    return total
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.requests
+
+    instrumented = metrics.MetricsMiddleware(bare_app)
+    await run(bare_app, 1000)  # warm up
+    await run(instrumented, 1000)
+    bare = min([await run(bare_app, n) for _ in range(3)])
+    timed = min([await run(instrumented, n) for _ in range(3)])
+    stmt = min(per_statement(n) for _ in range(3))
+
+    print(f"bare app        {bare / n * 1e6:6.2f} us/request")
+    print(f"with middleware {timed / n * 1e6:6.2f} us/request")
+    print(f"overhead        {(timed - bare) / n * 1e6:6.2f} us/request")
+    print(f"db hook         {stmt / n * 1e6:6.2f} us/statement")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Shared helpers for the benchmark scripts: Postgres setup, in-process server, latency stats.
+
+Import app modules only after database_url() has put DATABASE_URL in the environment:
+app.database builds its engine at import time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+@dataclass(slots=True)
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @classmethod
+    def from_latencies(cls, name: str, latencies: list[float], errors: int, seconds: float) -> ScenarioResult:
+        lat = sorted(latencies)
+        return cls(
+            name=name,
+            requests=len(lat),
+            errors=errors,
+            seconds=round(seconds, 3),
+            rps=round(len(lat) / seconds, 1) if seconds else 0.0,
+            p50_ms=round(percentile(lat, 0.50) * 1000, 2),
+            p95_ms=round(percentile(lat, 0.95) * 1000, 2),
+            p99_ms=round(percentile(lat, 0.99) * 1000, 2),
+            max_ms=round((lat[-1] if lat else 0.0) * 1000, 2),
+        )
+
+    def line(self) -> str:
+        return (
+            f"{self.name:8s} {self.requests:7d} req {self.rps:9,.0f} req/s  p50 {self.p50_ms:8.1f}ms  "
+            f"p95 {self.p95_ms:8.1f}ms  p99 {self.p99_ms:8.1f}ms  errors {self.errors}"
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class EphemeralPostgres:
+    """A throwaway Postgres in a temp directory (needs the optional `pgserver` package)."""
+
+    def __init__(self) -> None:
+        try:
+            import pgserver
+        except ImportError as e:
+            raise SystemExit("--ephemeral needs `pip install pgserver` (or pass --database-url)") from e
+        self._dir = tempfile.mkdtemp(prefix="tracking-bench-")
+        self._server = pgserver.get_server(self._dir, cleanup_mode="delete")
+        self._server.psql("CREATE DATABASE tracking_bench;")
+        self.url = f"postgresql+asyncpg://postgres@/tracking_bench?host={self._dir}"
+
+    def close(self) -> None:
+        self._server.cleanup()
+
+
+def migrate(url: str) -> None:
+    """alembic upgrade head against url (alembic/env.py converts asyncpg URLs to psycopg)."""
+    env = {**os.environ, "DATABASE_URL": url}
+    env.pop("ALEMBIC_DATABASE_URL", None)
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True)
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+class InProcessServer:
+    """uvicorn serving app.main:app on its own event loop in a background thread."""
+
+    def __init__(self, port: int) -> None:
+        import uvicorn
+
+        from app.main import app
+
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", access_log=False, timeout_keep_alive=60, backlog=4096
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self) -> InProcessServer:
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+async def run_concurrently(concurrency: int, jobs: list[Any], fn: Any) -> tuple[list[float], int, float]:
+    """Await fn(job) for every job with at most `concurrency` in flight; fn returns True on success."""
+    latencies: list[float] = []
+    errors = 0
+    it = iter(jobs)
+
+    async def worker() -> None:
+        nonlocal errors
+        for job in it:
+            start = time.perf_counter()
+            try:
+                ok = await fn(job)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(jobs)) or 1)))
+    return latencies, errors, time.perf_counter() - start
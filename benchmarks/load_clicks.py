@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Click redirect latency under concurrency, old vs tuned connection pool settings.
+
+Starts the app with uvicorn (one worker, DATABASE_URL from the environment, migrated schema
+required) once per profile and fires --clicks GET /go/{campaign}/{id} requests with
+--concurrency in flight, then reports throughput and p50/p95/p99 latency.
+
+  before  the previous hardcoded engine: 5+10 pool, pre-ping on every checkout
+  after   the Settings defaults (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, ...)
+
+Leads and events are created under a random tracking_id prefix and deleted afterwards;
+campaign rollups for campaign "loadtest" remain, so use a scratch database.
+
+Usage: python benchmarks/load_clicks.py --clicks 5000 --concurrency 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from harness import ROOT, free_port, percentile
+
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models import Event, Lead  # noqa: E402
+
+PROFILES: dict[str, dict[str, str]] = {
+    "before": {"DB_POOL_SIZE": "5", "DB_MAX_OVERFLOW": "10", "DB_POOL_PRE_PING": "true", "DB_POOL_RECYCLE": "-1"},
+    "after": {},
+}
+
+
+def start_server(port: int, env_overrides: dict[str, str]) -> subprocess.Popen:
+    env = {**os.environ, "ENVIRONMENT": "production", "LOG_LEVEL": "WARNING", "INGEST_MODE": "sync", **env_overrides}
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+    cmd += ["--log-level", "warning", "--no-access-log", "--timeout-keep-alive", "60", "--backlog", "4096"]
+    return subprocess.Popen(
+        cmd,
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not start")
+        await asyncio.sleep(0.1)
+
+
+async def fire(client: httpx.AsyncClient, prefix: str, clicks: int, concurrency: int) -> tuple[list[float], float, int]:
+    latencies: list[float] = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                r = await client.get(f"/go/loadtest/{prefix}{i % (clicks // 2 or 1)}")
+                ok = r.status_code == 302
+            except httpx.TransportError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(clicks)))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Event).where(Event.tracking_id.startswith(prefix)))
+        await db.execute(delete(Lead).where(Lead.tracking_id.startswith(prefix)))
+        await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clicks", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--profiles", default="before,after")
+    args = parser.parse_args()
+
+    for name in args.profiles.split(","):
+        port = free_port()
+        server = start_server(port, PROFILES[name])
+        prefix = f"load-{uuid.uuid4().hex[:8]}-"
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_ready(client)
+                await fire(client, f"{prefix}warm-", 200, 50)
+                latencies, elapsed, errors = await fire(client, prefix, args.clicks, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+            await cleanup(prefix)
+        latencies.sort()
+        print(
+            f"{name:7s} {args.clicks / elapsed:8,.0f} req/s  "
+            f"p50 {percentile(latencies, 0.50) * 1000:7.1f}ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f}ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:7.1f}ms  errors {errors}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Traffic replay benchmark suite: throughput and p50/p95/p99 per scenario, saved as JSON.
+
+Starts the app in-process (uvicorn on a background thread) against --database-url /
+DATABASE_URL, or a throwaway Postgres with --ephemeral (needs `pgserver`), runs
+`alembic upgrade head`, then replays, in order:
+
+  create  POST /leads, one lead per request (emails)
+  bulk    POST /leads/bulk, NDJSON uploads of --bulk-rows leads each
+  blast   campaign send: GET /go/{campaign}/{id} over --leads recipients (some click twice)
+  opens   GET /o/{id}.png for the same recipients (repeat opens included)
+  scan    GET /leads pages at random depths (cursors collected beforehand)
+
+Each scenario sends --requests requests (bulk: --bulk-uploads) with --concurrency in flight.
+Results go to benchmarks/results/<UTC time>-<commit>.json; --compare OLD.json prints the change
+per scenario. Rows are created under a random prefix and deleted afterwards unless --ephemeral.
+
+pgserver ships without the pg_trgm extension, so on --ephemeral migration 014 logs a warning
+and skips the /leads/search index. No scenario here searches; for search latency run
+bench_lead_search.py against a Postgres that has pg_trgm (contrib).
+
+Usage:
+  python benchmarks/run_suite.py --ephemeral
+  python benchmarks/run_suite.py --requests 5000 --concurrency 200 --scenarios blast,opens
+  python benchmarks/run_suite.py --compare benchmarks/results/20260101T000000Z-abc1234.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from harness import (
+    ROOT,
+    EphemeralPostgres,
+    InProcessServer,
+    ScenarioResult,
+    free_port,
+    git_commit,
+    migrate,
+    run_concurrently,
+)
+
+SCENARIOS = ("create", "bulk", "blast", "opens", "scan")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class Suite:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self.client = client
+        self.args = args
+        self.prefix = f"suite-{uuid.uuid4().hex[:8]}-"
+        self.campaign = f"{self.prefix}campaign"
+        self.rng = random.Random(7)
+
+    def _recipients(self) -> list[str]:
+        # Most recipients act once, a tail repeats (forwarded mail, link scanners)
+        n, leads = self.args.requests, self.args.leads
+        ids = [f"{self.prefix}r{i % leads}" for i in range(n)]
+        self.rng.shuffle(ids)
+        return ids
+
+    async def create(self) -> tuple[list[float], int, float]:
+        async def one(i: int) -> bool:
+            r = await self.client.post("/leads", json={"email": f"{self.prefix}{i}@bench.test", "campaign_name": self.campaign})
+            return r.status_code == 201
+
+        return await run_concurrently(self.args.concurrency, list(range(self.args.requests)), one)
+
+    async def bulk(self) -> tuple[list[float], int, float]:
+        rows = self.args.bulk_rows
+
+        async def one(u: int) -> bool:
+            body = "".join(
+                json.dumps({"lead_id": f"{self.prefix}b{u}-{i}", "email": f"{self.prefix}b{u}-{i}@bench.test"}) + "\n"
+                for i in range(rows)
+            )
+            r = await self.client.post(
+                "/leads/bulk",
+                params={"campaign_name": self.campaign},
+                content=body.encode(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            return r.status_code == 200 and r.json()["accepted"] == rows
+
+        return await run_concurrently(min(self.args.concurrency, 4), list(range(self.args.bulk_uploads)), one)
+
+    async def blast(self) -> tuple[list[float], int, float]:
+        async def one(tracking_id: str) -> bool:
+            r = await self.client.get(f"/go/{self.campaign}/{tracking_id}")
+            return r.status_code == 302
+
+        return await run_concurrently(self.args.concurrency, self._recipients(), one)
+
+    async def opens(self) -> tuple[list[float], int, float]:
+        async def one(tracking_id: str) -> bool:
+            r = await self.client.get(f"/o/{tracking_id}.png")
+            return r.status_code == 200
+
+        return await run_concurrently(self.args.concurrency, self._recipients(), one)
+
+    async def scan(self) -> tuple[list[float], int, float]:
+        cursors: list[str | None] = [None]
+        params: dict[str, Any] = {"limit": self.args.page_size}
+        while len(cursors) < self.args.scan_depth:
+            r = await self.client.get("/leads", params={**params, "cursor": cursors[-1]} if cursors[-1] else params)
+            cursor = r.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            cursors.append(cursor)
+        pages = [self.rng.choice(cursors) for _ in range(self.args.requests)]
+
+        async def one(cursor: str | None) -> bool:
+            r = await self.client.get("/leads", params={**params, "cursor": cursor} if cursor else params)
+            return r.status_code == 200
+
+        return await run_concurrently(self.args.concurrency, pages, one)
+
+
+async def cleanup(url: str, prefix: str) -> None:
+    # Own engine: app.database.engine's connections belong to the server thread's event loop
+    from sqlalchemy import delete, or_
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.database import _ensure_asyncpg_url
+    from app.models import Event, Lead
+
+    engine = create_async_engine(_ensure_asyncpg_url(url), poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(delete(Event).where(Event.tracking_id.startswith(prefix)))
+        await conn.execute(delete(Lead).where(or_(Lead.tracking_id.startswith(prefix), Lead.email.startswith(prefix))))
+    await engine.dispose()
+
+
+def compare(old_path: Path, new: dict[str, Any]) -> None:
+    old = {s["name"]: s for s in json.loads(old_path.read_text())["scenarios"]}
+    print(f"\nvs {old_path.name}:")
+    for s in new["scenarios"]:
+        o = old.get(s["name"])
+        if o is None:
+            continue
+        parts = []
+        for key in ("rps", "p50_ms", "p99_ms"):
+            change = (s[key] - o[key]) / o[key] * 100 if o[key] else 0.0
+            parts.append(f"{key} {o[key]:,.1f} -> {s[key]:,.1f} ({change:+.0f}%)")
+        print(f"  {s['name']:8s} " + "  ".join(parts))
+
+
+async def run(args: argparse.Namespace, url: str) -> dict[str, Any]:
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results: list[ScenarioResult] = []
+    with InProcessServer(free_port()) as server:
+        async with httpx.AsyncClient(base_url=server.base_url, limits=limits, timeout=120) as client:
+            suite = Suite(client, args)
+            try:
+                for name in scenarios:
+                    latencies, errors, seconds = await getattr(suite, name)()
+                    result = ScenarioResult.from_latencies(name, latencies, errors, seconds)
+                    results.append(result)
+                    print(result.line(), flush=True)
+            finally:
+                if not args.ephemeral:
+                    await cleanup(url, suite.prefix)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": "ephemeral" if args.ephemeral else url.split("@")[-1],
+        "config": {k: v for k, v in vars(args).items() if k not in ("database_url", "compare", "output")},
+        "env": {k: v for k, v in os.environ.items() if k.startswith(("DB_", "INGEST_", "LEAD_CACHE_"))},
+        "scenarios": [r.as_dict() for r in results],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--ephemeral", action="store_true", help="start a throwaway Postgres (pip install pgserver)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--leads", type=int, default=1500, help="distinct recipients for blast/opens")
+    parser.add_argument("--bulk-uploads", type=int, default=10)
+    parser.add_argument("--bulk-rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--scan-depth", type=int, default=50, help="deepest GET /leads page scanned")
+    parser.add_argument("--output", type=Path, help="result file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to diff against")
+    args = parser.parse_args()
+
+    pg = EphemeralPostgres() if args.ephemeral else None
+    try:
+        url = pg.url if pg else args.database_url
+        if not url:
+            raise SystemExit("set DATABASE_URL, pass --database-url, or use --ephemeral")
+        os.environ["DATABASE_URL"] = url
+        os.environ.setdefault("ENVIRONMENT", "production")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        sys.path.insert(0, str(ROOT))
+        migrate(url)
+        report = asyncio.run(run(args, url))
+    finally:
+        if pg:
+            pg.close()
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{report['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nsaved {output}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
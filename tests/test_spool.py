@@ -0,0 +1,81 @@
+"""
+Outage classification for tracking writes (app/spool.py, app/ingest.py): a write that fails
+because Postgres cannot serve it must be spooled, not halved and dropped as rejected data.
+
+    python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import asyncpg
+import pytest
+from sqlalchemy import exc as sa_exc
+
+from app import ingest
+from app.ingest import PendingEvent, flush_events
+from app.spool import Spool, database_down, database_unavailable, mark_up
+
+
+def _dbapi_error(orig: Exception) -> sa_exc.DBAPIError:
+    return sa_exc.DBAPIError("INSERT INTO events ...", None, orig)
+
+
+@pytest.mark.parametrize(
+    "orig",
+    [
+        asyncpg.exceptions.QueryCanceledError("canceling statement due to statement timeout"),
+        asyncpg.exceptions.AdminShutdownError("terminating connection due to administrator command"),
+        asyncpg.exceptions.ConnectionFailureError("connection failure"),
+    ],
+)
+def test_unavailable_sqlstates(orig: Exception) -> None:
+    assert database_unavailable(_dbapi_error(orig))
+
+
+@pytest.mark.parametrize(
+    "orig",
+    [
+        asyncpg.exceptions.UniqueViolationError("duplicate key value"),
+        asyncpg.exceptions.StringDataRightTruncationError("value too long for type character varying(128)"),
+    ],
+)
+def test_rejected_data_is_not_unavailable(orig: Exception) -> None:
+    assert not database_unavailable(_dbapi_error(orig))
+
+
+@pytest.fixture
+def spooled(tmp_path, monkeypatch):
+    """A fresh spool in tmp_path; the outage flag is cleared afterwards."""
+    target = Spool(str(tmp_path), 1 << 20, 0.2)
+    monkeypatch.setattr(ingest, "spool", target)
+    yield target
+    mark_up()
+
+
+def test_statement_timeout_spools_instead_of_dropping(spooled, monkeypatch) -> None:
+    async def timed_out(db, events, replay=False):
+        raise _dbapi_error(asyncpg.exceptions.QueryCanceledError("canceling statement due to statement timeout"))
+
+    monkeypatch.setattr(ingest, "write_events", timed_out)
+    now = datetime.now(timezone.utc)
+    events = [PendingEvent(f"spool-test-{i}", "click", now, "camp") for i in range(4)]
+
+    asyncio.run(flush_events(events))
+
+    assert database_down()
+    assert spooled.pending
+    assert bytes(spooled._buffer).count(b"spool-test-") == len(events)
+
+
+def test_rejected_event_is_dropped_not_spooled(spooled, monkeypatch) -> None:
+    async def rejected(db, events, replay=False):
+        raise _dbapi_error(asyncpg.exceptions.UniqueViolationError("duplicate key value"))
+
+    monkeypatch.setattr(ingest, "write_events", rejected)
+    asyncio.run(flush_events([PendingEvent("spool-test", "open", datetime.now(timezone.utc))]))
+
+    assert not database_down()
+    assert not spooled.pending